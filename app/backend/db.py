@@ -3,10 +3,33 @@ from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, Asyn
 from sqlalchemy.orm import DeclarativeBase
 
 
+from app.backend.pool import PoolMetrics, metered_pool_class
+from app.backend.query_stats import track_queries
 from config import settings
 
 
-engine = create_async_engine(settings.DATABASE_URL, echo=True)
+def engine_options(url: str, metrics: PoolMetrics) -> dict:
+    options = {
+        'echo': settings.DB_ECHO,
+        'poolclass': metered_pool_class(metrics),
+        'pool_size': settings.DB_POOL_SIZE,
+        'max_overflow': settings.DB_MAX_OVERFLOW,
+        'pool_timeout': settings.DB_POOL_TIMEOUT,
+        'pool_recycle': settings.DB_POOL_RECYCLE,
+        'pool_pre_ping': settings.DB_POOL_PRE_PING,
+    }
+    if url.startswith('postgresql+asyncpg'):
+        options['connect_args'] = {
+            'statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE,
+            'prepared_statement_cache_size': settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        }
+    return options
+
+
+pool_metrics = PoolMetrics()
+
+engine = create_async_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL, pool_metrics))
+track_queries(engine)
 
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
@@ -1,7 +1,43 @@
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from app.backend.db import async_session_maker
+from app.backend.replicas import replica_router
 
 
 async def get_db() -> AsyncSession:
     async with async_session_maker() as session:
         yield session
+
+
+async def get_read_db() -> AsyncSession:
+    for replica in replica_router.candidates():
+        session = replica.session_maker()
+        try:
+            # Check out the connection up front so a dead replica falls through to the next one
+            await session.connection()
+        except (DBAPIError, PoolTimeoutError, OSError):
+            await session.close()
+            replica_router.mark_down(replica)
+            continue
+
+        async with session:
+            yield session
+        return
+
+    async with async_session_maker() as session:
+        yield session
+
+
+async def get_read_session_maker() -> async_sessionmaker:
+    # Streaming responses outlive their dependencies, so such handlers open sessions themselves.
+    # The replica is checked here: once the stream has started, a failure can only truncate it
+    for replica in replica_router.candidates():
+        try:
+            async with replica.engine.connect():
+                pass
+        except (DBAPIError, PoolTimeoutError, OSError):
+            replica_router.mark_down(replica)
+            continue
+        return replica.session_maker
+
+    return async_session_maker
@@ -0,0 +1,58 @@
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def observe_wait(self, seconds: float):
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        if seconds > self.wait_seconds_max:
+            self.wait_seconds_max = seconds
+
+    def snapshot(self, pool) -> dict:
+        stats = {
+            'checkouts': self.checkouts,
+            'timeouts': self.timeouts,
+            'wait_seconds_total': self.wait_seconds_total,
+            'wait_seconds_max': self.wait_seconds_max,
+            'wait_seconds_avg': self.wait_seconds_total / self.checkouts if self.checkouts else 0.0,
+        }
+        if isinstance(pool, MeteredQueuePool):
+            capacity = pool.size() + max(pool._max_overflow, 0)
+            stats.update({
+                'size': pool.size(),
+                'checked_in': pool.checkedin(),
+                'checked_out': pool.checkedout(),
+                'overflow': max(pool.overflow(), 0),
+                'saturation': pool.checkedout() / capacity if capacity else 0.0,
+            })
+        return stats
+
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long checkouts wait for a free connection."""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        self.metrics.observe_wait(time.perf_counter() - started)
+        return record
+
+
+def metered_pool_class(metrics: PoolMetrics) -> type[MeteredQueuePool]:
+    # Pool.recreate() instantiates self.__class__, so metrics live on the class rather than the instance
+    return type('MeteredQueuePool', (MeteredQueuePool,), {'metrics': metrics})
@@ -0,0 +1,43 @@
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.services.metrics import db_statement_duration
+
+
+class QueryStats:
+    """SQL issued while serving one request."""
+
+    __slots__ = ('count', 'seconds', 'shapes')
+
+    def __init__(self, track_shapes: bool = False):
+        self.count = 0
+        self.seconds = 0.0
+        # SQL text -> executions; bound values are parameters, so repeats of one query share a key
+        self.shapes: dict[str, int] | None = {} if track_shapes else None
+
+
+# SQLAlchemy runs cursor events in greenlets that share the calling task's context
+current_query_stats: ContextVar[QueryStats | None] = ContextVar('current_query_stats', default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    db_statement_duration.observe(elapsed)
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+        if stats.shapes is not None:
+            stats.shapes[statement] = stats.shapes.get(statement, 0) + 1
+
+
+def track_queries(engine: AsyncEngine):
+    event.listen(engine.sync_engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine.sync_engine, 'after_cursor_execute', _after_cursor_execute)
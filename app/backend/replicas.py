@@ -0,0 +1,71 @@
+import itertools
+import time
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.backend.db import engine_options
+from app.backend.pool import PoolMetrics
+from app.backend.query_stats import track_queries
+from config import settings
+
+
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.metrics = PoolMetrics()
+        self.engine = create_async_engine(url, **engine_options(url, self.metrics))
+        track_queries(self.engine)
+        self.session_maker = async_sessionmaker(self.engine, expire_on_commit=False, class_=AsyncSession)
+        self.down_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def snapshot(self) -> dict:
+        return {'available': self.available, **self.metrics.snapshot(self.engine.pool)}
+
+
+class ReplicaRouter:
+    def __init__(self, replicas: list[Replica], strategy: str, retry_after: float,
+                 hold_after_invalidation: float = 0):
+        if strategy not in ('round_robin', 'least_connections'):
+            raise ValueError(f'Unknown replica strategy: {strategy}')
+        self.replicas = replicas
+        self.strategy = strategy
+        self.retry_after = retry_after
+        self.hold_after_invalidation = hold_after_invalidation
+        self._counter = itertools.count()
+        self._primary_until = 0.0
+
+    def candidates(self) -> list[Replica]:
+        """Available replicas in the order they should be tried; none while reads are held on the primary."""
+        if self._primary_until and time.monotonic() < self._primary_until:
+            return []
+        replicas = [replica for replica in self.replicas if replica.available]
+        if len(replicas) < 2:
+            return replicas
+        if self.strategy == 'least_connections':
+            return sorted(replicas, key=lambda replica: replica.engine.pool.checkedout())
+        start = next(self._counter) % len(replicas)
+        return replicas[start:] + replicas[:start]
+
+    def mark_down(self, replica: Replica):
+        replica.down_until = time.monotonic() + self.retry_after
+
+    def invalidated(self):
+        """Cached data was just invalidated after a write the replicas may not have applied yet.
+
+        Reads go to the primary for ``hold_after_invalidation`` seconds, so neither the response nor
+        what gets cached from it is older than the write.
+        """
+        if self.hold_after_invalidation:
+            self._primary_until = time.monotonic() + self.hold_after_invalidation
+
+
+replica_router = ReplicaRouter(
+    [Replica(f'replica_{index}', url) for index, url in enumerate(settings.DB_REPLICA_URLS)],
+    strategy=settings.DB_REPLICA_STRATEGY,
+    retry_after=settings.DB_REPLICA_RETRY_AFTER,
+    hold_after_invalidation=settings.DB_REPLICA_MAX_LAG,
+)
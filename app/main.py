@@ -1,10 +1,23 @@
-from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 from loguru import logger
 from uuid import uuid4
 
-from app.routers import category, products, auth, permission, reviews
+from app.backend.db import async_session_maker
+from app.backend.query_stats import QueryStats, current_query_stats
+from app.routers import category, products, auth, permission, reviews, metrics
+from app.services.access_log import access_log, should_log
+from app.services.jobs import task_queue
+from app.services.metrics import http_requests_in_flight, observe_request
+from app.services.query_budget import check_request, tracking_enabled
+from app.services.refresh_tokens import run_refresh_token_sweeper
+from app.services.reservations import run_reservation_sweeper
+from config import settings
 
 
 
@@ -12,23 +25,90 @@ logger.add("info.log",
            format="Log: [{extra[log_id]}:{time} - {level} - {message} ",
            level="INFO", enqueue = True
           )
-app = FastAPI()
 
-@app.middleware("http")
-async def log_middleware(request: Request, call_next):
-    log_id = str(uuid4())
-    with logger.contextualize(log_id=log_id):
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    sweepers = [
+        asyncio.create_task(run_reservation_sweeper(async_session_maker, settings.RESERVATION_SWEEP_INTERVAL)),
+        asyncio.create_task(run_refresh_token_sweeper(async_session_maker, settings.REFRESH_TOKEN_SWEEP_INTERVAL)),
+    ]
+    await task_queue.start()
+    yield
+    for sweeper in sweepers:
+        sweeper.cancel()
+    await asyncio.gather(*sweepers, return_exceptions=True)
+    await task_queue.drain(settings.TASK_DRAIN_TIMEOUT)
+    access_log.close()
+
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+
+class LogMiddleware:
+    """Access log and request metrics with duration, route template and DB time for every request.
+
+    A plain ASGI middleware rather than ``@app.middleware``, so requests are not routed through
+    an extra task and response stream, and the duration covers the whole body.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        http_requests_in_flight.inc()
+        query_stats = QueryStats(track_shapes=tracking_enabled())
+        stats_token = current_query_stats.set(query_stats)
+        status_code = 500
+        response_started = False
+        request_id = None
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_started
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                response_started = True
+            await send(message)
+
         try:
-            response = await call_next(request)
-            if response.status_code in [401, 402, 403, 404]:
-                logger.warning(f"Request to {request.url.path} failed")
-            else:
-                logger.info('Successfully accessed ' + request.url.path)
+            await self.app(scope, receive, send_wrapper)
         except Exception as ex:
-            logger.error(f"Request to {request.url.path} failed: {ex}")
-            response = JSONResponse(content={"success": False}, status_code=500)
-        return response
+            request_id = uuid4().hex
+            logger.bind(log_id=request_id).error(f"Request to {scope['path']} failed: {ex}")
+            if not response_started:
+                response = JSONResponse(content={"success": False}, status_code=500)
+                await response(scope, receive, send)
+        finally:
+            current_query_stats.reset(stats_token)
+            http_requests_in_flight.dec()
+
+        duration = time.perf_counter() - started
+        route = getattr(scope.get('route'), 'path', None)
+        # Unmatched paths share one label so scanners cannot blow up the metric cardinality
+        observe_request(scope['method'], route or 'unmatched', status_code, duration,
+                        query_stats.count, query_stats.seconds)
+
+        duration_ms = duration * 1000
+        if should_log(status_code, duration_ms):
+            access_log.write({
+                'time': time.time(),
+                'request_id': request_id or uuid4().hex,
+                'method': scope['method'],
+                'route': route,
+                'path': scope['path'],
+                'status': status_code,
+                'duration_ms': round(duration_ms, 3),
+                'db_ms': round(query_stats.seconds * 1000, 3),
+                'db_queries': query_stats.count,
+            })
+        # Development and test runs only: flags N+1 patterns and routes over their query budget
+        check_request(scope['method'], route or 'unmatched', query_stats)
+
 
+app.add_middleware(LogMiddleware)
 
 
 @app.get("/")
@@ -46,3 +126,4 @@ app.include_router(products.router)
 app.include_router(auth.router)
 app.include_router(permission.router)
 app.include_router(reviews.router)
+app.include_router(metrics.router)
@@ -30,12 +30,23 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 
+# Колонки, которыми управляют только миграции (сгенерированный tsvector для поиска)
+MIGRATION_ONLY_COLUMNS = {('products', 'search_vector')}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == 'column' and (object.table.name, name) in MIGRATION_ONLY_COLUMNS:
+        return False
+    return True
+
+
 # Двигатель конфигурации для offline режима
 def run_migrations_offline():
     """Run migrations in 'offline' mode."""
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=target_metadata, literal_binds=True, dialect_opts={"paramstyle": "named"}
+        url=url, target_metadata=target_metadata, literal_binds=True, dialect_opts={"paramstyle": "named"},
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -59,7 +70,7 @@ async def run_migrations_online():
 
 
 def do_run_migrations(connection):  # new
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
 
     with context.begin_transaction():
         context.run_migrations()
@@ -0,0 +1,37 @@
+"""products_search_vector
+
+Revision ID: f6a0c3d9b281
+Revises: d2f8b4a61e95
+Create Date: 2026-10-18 16:48:52.207734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a0c3d9b281'
+down_revision: Union[str, None] = 'd2f8b4a61e95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Must match SEARCH_LANGUAGE in config.Settings
+SEARCH_LANGUAGE = 'simple'
+
+
+def upgrade() -> None:
+    op.execute(f"""
+        ALTER TABLE products ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('{SEARCH_LANGUAGE}', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('{SEARCH_LANGUAGE}', coalesce(description, '')), 'B')
+        ) STORED
+    """)
+    op.create_index('ix_products_search_vector', 'products', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_search_vector', table_name='products', postgresql_using='gin')
+    op.drop_column('products', 'search_vector')
@@ -4,3 +4,6 @@ from .user import User
 from .reviews import Review
 from .ratings import Rating
 
+from .refresh_tokens import RefreshToken
+from .reservations import StockReservation
+from .background_jobs import BackgroundJob
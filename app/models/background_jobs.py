@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, String, DateTime, Index, JSON, text
+
+from app.backend.db import Base
+from app.models import *
+
+
+class BackgroundJob(Base):
+    __tablename__ = 'background_jobs'
+    __table_args__ = (
+        # Workers claim the oldest due pending jobs
+        Index('ix_background_jobs_status_run_after', 'status', 'run_after'),
+        # At most one pending job per (name, key); enqueueing a duplicate is a no-op
+        Index('uq_background_jobs_pending_key', 'name', 'key', unique=True,
+              postgresql_where=text("status = 'pending'"), sqlite_where=text("status = 'pending'")),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(64), nullable=False)
+    key = Column(String(128), nullable=True)
+    args = Column(JSON, nullable=False)
+    # pending -> running -> deleted on success; back to pending for a retry, or failed for good
+    status = Column(String(16), default='pending', nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    run_after = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
@@ -1,5 +1,7 @@
+from datetime import datetime, timezone
+
 from app.backend.db import Base
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime
 from sqlalchemy.orm import relationship
 from app.models.products import Product
 
@@ -13,6 +15,9 @@ class Category(Base):
     slug = Column(String, unique=True, index=True)
     is_active = Column(Boolean, default=True)
     parent_id = Column(Integer, ForeignKey('categories.id'), nullable=True)
+    updated_at = Column(DateTime, index=True,
+                        default=lambda: datetime.now(timezone.utc).replace(tzinfo=None),
+                        onupdate=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
 
     products = relationship("Product", back_populates="category")
 
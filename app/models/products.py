@@ -1,11 +1,19 @@
+from datetime import datetime, timezone
+
 from app.backend.db import Base
-from sqlalchemy import Column, ForeignKey, Integer, String, Boolean, Float
+from sqlalchemy import Column, ForeignKey, Integer, String, Boolean, Float, Index, DateTime
 from sqlalchemy.orm import relationship
 from app.models import *
 
 
 class Product(Base):
     __tablename__ = 'products'
+    __table_args__ = (
+        Index('ix_products_active_stock_category_id', 'is_active', 'stock', 'category_id', 'id'),
+        Index('ix_products_active_price', 'is_active', 'price', 'id'),
+        Index('ix_products_active_rating', 'is_active', 'rating', 'id'),
+        Index('ix_products_supplier_active', 'supplier_id', 'is_active', 'id'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String)
@@ -16,8 +24,13 @@ class Product(Base):
     stock = Column(Integer)
     supplier_id = Column(Integer, ForeignKey('users.id'), nullable=True)
     rating = Column(Float, default=0.0)
+    rating_count = Column(Integer, default=0, server_default='0', nullable=False)
+    rating_sum = Column(Integer, default=0, server_default='0', nullable=False)
     is_active = Column(Boolean, default=True)
     category_id = Column(Integer, ForeignKey('categories.id'))
+    updated_at = Column(DateTime, index=True,
+                        default=lambda: datetime.now(timezone.utc).replace(tzinfo=None),
+                        onupdate=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
 
     category = relationship('Category', back_populates='products')
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Integer, Column, ForeignKey
+from sqlalchemy import Boolean, Integer, Column, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 
 from app.backend.db import Base
@@ -7,6 +7,11 @@ from app.models import *
 
 class Rating(Base):
     __tablename__ = 'ratings'
+    __table_args__ = (
+        # Rating aggregates group the active ratings by product; grade makes it index-only
+        Index('ix_ratings_active_product_id', 'product_id', 'grade',
+              postgresql_where=text('is_active'), sqlite_where=text('is_active = 1')),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     grade = Column(Integer)
     user_id = Column(Integer, ForeignKey('users.id'))
@@ -0,0 +1,20 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, ForeignKey, Integer, String, Boolean, DateTime
+
+from app.backend.db import Base
+from app.models import *
+
+
+class RefreshToken(Base):
+    __tablename__ = 'refresh_tokens'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey('users.id'), index=True)
+    # HMAC of the token; the token itself is never stored
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    # Every token rotated out of the same login shares a family, so a replayed token can revoke all of them
+    family_id = Column(String(32), index=True, nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    expires_at = Column(DateTime, nullable=False)
+    is_revoked = Column(Boolean, default=False, nullable=False)
@@ -0,0 +1,23 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, ForeignKey, Integer, String, DateTime, Index
+
+from app.backend.db import Base
+from app.models import *
+
+
+class StockReservation(Base):
+    __tablename__ = 'stock_reservations'
+    __table_args__ = (
+        # The sweeper looks for reservations that are still held past their expiry
+        Index('ix_stock_reservations_status_expires', 'status', 'expires_at'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    product_id = Column(Integer, ForeignKey('products.id'), index=True)
+    user_id = Column(Integer, ForeignKey('users.id'), index=True)
+    quantity = Column(Integer, nullable=False)
+    # reserved -> committed when the order goes through, reserved -> released on cancel or expiry
+    status = Column(String(16), default='reserved', nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    expires_at = Column(DateTime, nullable=False)
@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 
-from sqlalchemy import String, Boolean, Integer, Column, ForeignKey, DateTime
+from sqlalchemy import String, Boolean, Integer, Column, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 
 from app.backend.db import Base
@@ -9,6 +9,9 @@ from app.models import *
 class Review(Base):
 
     __tablename__ = 'reviews'
+    __table_args__ = (
+        Index('ix_reviews_product_active_date', 'product_id', 'is_active', 'comment_date', 'id'),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey('users.id'))
     product_id = Column(Integer, ForeignKey('products.id'))
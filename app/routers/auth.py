@@ -9,22 +9,25 @@ from typing import Annotated
 from datetime import timedelta
 
 from app.models.user import User
-from app.schemas import CreateUser
+from app.schemas import CreateUser, RefreshTokenRequest
 from app.backend.db_depends import get_db
-from app.services.security import bcrypt_context
+from app.services.security import hash_password
 from app.services.auth_helpers import authenticate_user, create_access_token, get_current_user
+from app.services.rate_limit import limit_by_ip
+from app.services.refresh_tokens import issue_refresh_token, rotate_refresh_token
+from config import settings
 
 
 router = APIRouter(prefix='/auth', tags=['auth'])
 
 
-@router.post('/')
+@router.post('/', dependencies=[Depends(limit_by_ip('register'))])
 async def create_user(db: Annotated[AsyncSession, Depends(get_db)], create_user: CreateUser):
     await db.execute(insert(User).values(first_name=create_user.first_name,
                                          last_name=create_user.last_name,
                                          username=create_user.username,
                                          email=create_user.email,
-                                         hashed_password=bcrypt_context.hash(create_user.password),
+                                         hashed_password=await hash_password(create_user.password),
                                          ))
     await db.commit()
     return {
@@ -35,7 +38,7 @@ async def create_user(db: Annotated[AsyncSession, Depends(get_db)], create_user:
 # ----------------------------------------------------------------------------------------------------------------------
 
 
-@router.post('/token')
+@router.post('/token', dependencies=[Depends(limit_by_ip('login'))])
 async def login(db: Annotated[AsyncSession, Depends(get_db)], form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
     user = await authenticate_user(db, form_data.username, form_data.password)
     token = await create_access_token(user.username,
@@ -43,9 +46,28 @@ async def login(db: Annotated[AsyncSession, Depends(get_db)], form_data: Annotat
                                       user.is_admin,
                                       user.is_supplier,
                                       user.is_customer,
-                                      expires_delta=timedelta(minutes=20))
+                                      expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+    refresh_token = await issue_refresh_token(db, user.id)
+    await db.commit()
+    return {
+        'access_token': token,
+        'refresh_token': refresh_token,
+        'token_type': 'bearer'
+    }
+
+
+@router.post('/refresh')
+async def refresh(db: Annotated[AsyncSession, Depends(get_db)], refresh_request: RefreshTokenRequest):
+    user, refresh_token = await rotate_refresh_token(db, refresh_request.refresh_token)
+    token = await create_access_token(user.username,
+                                      user.id,
+                                      user.is_admin,
+                                      user.is_supplier,
+                                      user.is_customer,
+                                      expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
     return {
         'access_token': token,
+        'refresh_token': refresh_token,
         'token_type': 'bearer'
     }
 
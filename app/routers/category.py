@@ -1,23 +1,30 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Request
 from slugify import slugify
-from sqlalchemy import insert, select, update
+from sqlalchemy import insert, select, update, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.backend.db_depends import get_db
+from app.backend.db_depends import get_db, get_read_db
 from app.models import *
-from app.schemas import CreateCategory
+from app.schemas import CreateCategory, CategoryOut
 from app.services.auth_helpers import get_current_user
+from app.services.cache import response_cache
+from app.services.category_tree import category_tree_cache
 
 router = APIRouter(prefix='/category', tags=['category'])
 
 
-@router.get('/all_categories')
-async def get_all_categories(db: Annotated[AsyncSession, Depends(get_db)]):
-    categories_query = select(Category).where(Category.is_active)
-    result = await db.scalars(categories_query)
-    categories = result.all()
+async def categories_last_modified(params: dict):
+    return await params['db'].scalar(select(func.max(Category.updated_at)))
+
+
+@router.get('/all_categories', response_model=list[CategoryOut])
+@response_cache.cached('all_categories', tags=('categories',), last_modified=categories_last_modified)
+async def get_all_categories(db: Annotated[AsyncSession, Depends(get_read_db)], request: Request):
+    categories_query = select(*CategoryOut.columns(Category)).where(Category.is_active)
+    result = await db.execute(categories_query)
+    categories = [CategoryOut.from_row(row) for row in result]
     return categories
 
 
@@ -32,6 +39,8 @@ async def create_category(db: Annotated[AsyncSession, Depends(get_db)],
 
         await db.execute(category_create_query)
         await db.commit()
+        category_tree_cache.invalidate()
+        await response_cache.invalidate('categories')
         return {
             'status_code': status.HTTP_201_CREATED,
             'transaction': 'Successful'
@@ -64,6 +73,8 @@ async def update_category(db: Annotated[AsyncSession, Depends(get_db)],
         await db.execute(update_category_query)
 
         await db.commit()
+        category_tree_cache.invalidate()
+        await response_cache.invalidate('categories')
         return {
             'status_code': status.HTTP_200_OK,
             'transaction': 'Category update is successful'
@@ -82,7 +93,7 @@ async def delete_category(db: Annotated[AsyncSession, Depends(get_db)],
                           get_user: Annotated[dict, Depends(get_current_user)]):
     if get_user.get('is_admin'):
         category_query = select(Category).where(Category.id == category_id)
-        category = db.scalar(category_query)
+        category = await db.scalar(category_query)
 
         if category is None:
             raise HTTPException(
@@ -93,6 +104,8 @@ async def delete_category(db: Annotated[AsyncSession, Depends(get_db)],
 
         await db.execute(update_query)
         await db.commit()
+        category_tree_cache.invalidate()
+        await response_cache.invalidate('categories')
         return {
             'status_code': status.HTTP_200_OK,
             'transaction': 'Category delete is successful'
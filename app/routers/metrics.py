@@ -0,0 +1,34 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.backend.db import engine, pool_metrics
+from app.backend.replicas import replica_router
+from app.services.cache import response_cache
+from app.services.metrics import cache_hits, cache_misses, observe_pool, registry
+
+router = APIRouter(prefix='/metrics', tags=['metrics'])
+
+
+@router.get('', response_class=PlainTextResponse)
+async def prometheus_metrics():
+    # Pool and cache totals live on their own objects; copy them in at scrape time
+    observe_pool('primary', pool_metrics.snapshot(engine.pool))
+    for replica in replica_router.replicas:
+        observe_pool(replica.name, replica.snapshot())
+    cache = response_cache.stats()
+    cache_hits.set((), cache['hits'])
+    cache_misses.set((), cache['misses'])
+    return PlainTextResponse(registry.render(), media_type='text/plain; version=0.0.4')
+
+
+@router.get('/pool')
+async def pool_stats():
+    return {
+        'primary': pool_metrics.snapshot(engine.pool),
+        'replicas': {replica.name: replica.snapshot() for replica in replica_router.replicas}
+    }
+
+
+@router.get('/cache')
+async def cache_stats():
+    return response_cache.stats()
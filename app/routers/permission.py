@@ -5,6 +5,8 @@ from starlette import status
 from app.services.auth_helpers import get_current_user
 from app.models.user import User
 from app.backend.db_depends import get_db
+from app.services.refresh_tokens import revoke_user_refresh_tokens
+from app.services.token_cache import revocation_list
 from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(prefix='/permission', tags=['permission'])
@@ -65,7 +67,9 @@ async def delete_user(db: Annotated[AsyncSession, Depends(get_db)],
 
         if user.is_active:
             await db.execute(update(User).where(User.id == user_id).values(is_active=False))
+            await revoke_user_refresh_tokens(db, user_id)
             await db.commit()
+            await revocation_list.revoke_user(user_id)
             return {
                 'status_code': status.HTTP_200_OK,
                 'detail': 'User is deleted'
@@ -1,14 +1,27 @@
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Body, Depends, status, HTTPException, Request, Query
+from fastapi.responses import StreamingResponse
 from slugify import slugify
-from sqlalchemy import insert, select, update, and_
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.backend.db_depends import get_db
+from app.backend.db_depends import get_db, get_read_db, get_read_session_maker
 from app.models import *
-from app.schemas import CreateProduct
+from app.schemas import (BulkProductUpdate, CreateProduct, ProductOut, ProductPage, ProductSearchPage,
+                         ReserveStock, ReserveStockBatch)
 from app.services.auth_helpers import get_current_user
+from app.services.bulk_import import import_products, upload_format
+from app.services.bulk_update import apply_product_updates
+from app.services.cache import response_cache
+from app.services.category_tree import category_tree_cache
+from app.services.export import EXPORT_MEDIA_TYPES, export_products
+from app.services.pagination import PageSize, decode_cursor, split_page
+from app.services.product_query import (ProductOrder, check_index_support, estimate_product_rows,
+                                        listing_cursor, product_listing_query)
+from app.services.reservations import commit_reservation, release_reservation, reserve_stock
+from app.services.search import search_mode, search_query, search_facets
+from config import settings
 
 router = APIRouter(
     prefix="/products",
@@ -16,17 +29,122 @@ router = APIRouter(
 )
 
 
-@router.get("/")
-async def all_products(db: Annotated[AsyncSession, Depends(get_db)]):
+async def category_products_last_modified(params: dict):
+    db = params['db']
+    products_modified = await db.scalar(select(func.max(Product.updated_at)))
+    categories_modified = await db.scalar(select(func.max(Category.updated_at)))
+    return max(filter(None, (products_modified, categories_modified)), default=None)
+
+
+async def product_last_modified(params: dict):
+    return await params['db'].scalar(select(Product.updated_at).where(Product.slug == params['product_slug']))
+
+
+@router.get("/", response_model=ProductPage)
+@response_cache.cached('all_products', tags=('products', 'categories'), last_modified=category_products_last_modified)
+async def all_products(db: Annotated[AsyncSession, Depends(get_read_db)],
+                       request: Request,
+                       price_min: int | None = None,
+                       price_max: int | None = None,
+                       rating_min: float | None = None,
+                       supplier_id: int | None = None,
+                       category: str | None = None,
+                       order_by: ProductOrder = 'id',
+                       cursor: str | None = None,
+                       limit: PageSize = settings.PAGE_SIZE_DEFAULT):
     is_active_condition = Product.is_active
     stock_condition = Product.stock > 0
 
-    product = select(Product).where(and_(is_active_condition, stock_condition))
-    result_product = await db.scalars(product)
-    result = result_product.all()
-    if not result:
+    filters = [is_active_condition, stock_condition]
+    range_columns = set()
+    if price_min is not None:
+        filters.append(Product.price >= price_min)
+        range_columns.add('price')
+    if price_max is not None:
+        filters.append(Product.price <= price_max)
+        range_columns.add('price')
+    if rating_min is not None:
+        filters.append(Product.rating >= rating_min)
+        range_columns.add('rating')
+    if supplier_id is not None:
+        filters.append(Product.supplier_id == supplier_id)
+    if category is not None:
+        category_tree = await category_tree_cache.get(db)
+        category_ids = category_tree.subtree_ids(category)
+        if not category_ids:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail="Category not found")
+        filters.append(Product.category_id.in_(category_ids))
+
+    narrowed = supplier_id is not None or category is not None
+    if range_columns and not narrowed and await estimate_product_rows(db) >= settings.PRODUCT_FILTER_GUARD_ROWS:
+        check_index_support(order_by, range_columns)
+
+    payload = decode_cursor(cursor) if cursor is not None else None
+    result_product = await db.execute(product_listing_query(filters, order_by, payload, limit))
+    result, next_cursor = split_page(result_product.all(), limit, listing_cursor(order_by))
+    if not result and cursor is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="There are no products")
-    return result
+    return ProductPage.model_construct(items=[ProductOut.from_row(row) for row in result],
+                                       next_cursor=next_cursor)
+
+
+@router.get('/search', response_model=ProductSearchPage)
+@response_cache.cached('search_products', tags=('products', 'search'))
+async def search_products(db: Annotated[AsyncSession, Depends(get_read_db)],
+                          request: Request,
+                          q: Annotated[str, Query(min_length=1, max_length=200)],
+                          category: str | None = None,
+                          price_min: int | None = None,
+                          price_max: int | None = None,
+                          cursor: str | None = None,
+                          limit: PageSize = settings.PAGE_SIZE_DEFAULT):
+    mode = search_mode(db)
+    base_filters = [Product.is_active, Product.stock > 0]
+
+    category_filters = []
+    if category is not None:
+        category_tree = await category_tree_cache.get(db)
+        category_ids = category_tree.subtree_ids(category)
+        if not category_ids:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail="Category not found")
+        category_filters.append(Product.category_id.in_(category_ids))
+
+    price_filters = []
+    if price_min is not None:
+        price_filters.append(Product.price >= price_min)
+    if price_max is not None:
+        price_filters.append(Product.price <= price_max)
+
+    payload = decode_cursor(cursor) if cursor is not None else None
+    query = search_query(mode, q, base_filters + category_filters + price_filters, payload, limit)
+    result = await db.execute(query)
+    page, next_cursor = split_page(result.all(), limit, lambda row: {'rank': row.rank, 'id': row.id})
+
+    facets = None
+    if cursor is None:
+        facets = await search_facets(db, mode, q, base_filters, category_filters, price_filters)
+
+    return ProductSearchPage.model_construct(items=[ProductOut.from_row(row) for row in page],
+                                             next_cursor=next_cursor,
+                                             facets=facets)
+
+
+@router.get('/export', response_class=StreamingResponse)
+async def export_catalog(session_maker: Annotated[async_sessionmaker, Depends(get_read_session_maker)],
+                         request: Request,
+                         export_format: Annotated[Literal['ndjson', 'csv'], Query(alias='format')] = 'ndjson'):
+    compress = 'gzip' in request.headers.get('accept-encoding', '')
+    headers = {
+        'Content-Disposition': f'attachment; filename="products.{export_format}"',
+        'Vary': 'Accept-Encoding',
+    }
+    if compress:
+        headers['Content-Encoding'] = 'gzip'
+    return StreamingResponse(export_products(session_maker, export_format, compress),
+                             media_type=EXPORT_MEDIA_TYPES[export_format],
+                             headers=headers)
 
 
 @router.post('/create')
@@ -46,6 +164,7 @@ async def create_product(db: Annotated[AsyncSession, Depends(get_db)],
         await db.execute(product_create)
 
         await db.commit()
+        await response_cache.invalidate('products')
 
         return {
             'status_code': status.HTTP_201_CREATED,
@@ -58,46 +177,163 @@ async def create_product(db: Annotated[AsyncSession, Depends(get_db)],
         )
 
 
-@router.get('/{category_slug}')
-async def product_by_category(db: Annotated[AsyncSession, Depends(get_db)], category_slug: str):
+@router.post('/bulk', openapi_extra={'requestBody': {'required': True, 'content': {
+    'text/csv': {'schema': {'type': 'string'}},
+    'application/x-ndjson': {'schema': {'type': 'string'}},
+}}})
+async def bulk_create_products(db: Annotated[AsyncSession, Depends(get_db)],
+                               request: Request,
+                               get_user: Annotated[dict, Depends(get_current_user)]):
+    if not (get_user.get('is_admin') or get_user.get('is_supplier')):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='You are not authorized to use this method'
+        )
+    upload = upload_format(request.headers.get('content-type'))
+    if upload is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail='Upload products as text/csv or application/x-ndjson'
+        )
+
+    # The body is read chunk by chunk, so an upload is never held in memory as a whole
+    report = await import_products(db, request.stream(), upload, get_user.get('id'))
+    if report['inserted']:
+        await response_cache.invalidate('products')
+    return {
+        'status_code': status.HTTP_201_CREATED if report['inserted'] else status.HTTP_200_OK,
+        'transaction': 'Successful' if not report['failed'] else 'Completed with errors',
+        **report
+    }
+
+
+@router.patch('/bulk')
+async def bulk_update_products(db: Annotated[AsyncSession, Depends(get_db)],
+                               updates: Annotated[list[BulkProductUpdate],
+                                                  Body(max_length=settings.BULK_UPDATE_MAX_ITEMS)],
+                               get_user: Annotated[dict, Depends(get_current_user)]):
+    if not (get_user.get('is_admin') or get_user.get('is_supplier')):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='You are not authorized to use this method'
+        )
+
+    counts = await apply_product_updates(db, updates, get_user.get('id'), bool(get_user.get('is_admin')))
+    if counts['updated']:
+        await response_cache.invalidate('products')
+    return {
+        'status_code': status.HTTP_200_OK,
+        'transaction': 'Bulk update is successful',
+        **counts
+    }
+
+
+async def reserve(db: AsyncSession, user_id: int, items: list[tuple[int, int]]):
+    reservations, expires_at = await reserve_stock(db, user_id, items)
+    if any(reservation['stock'] == 0 for reservation in reservations):
+        # Sold-out products drop out of listings, so cached pages are stale now
+        await response_cache.invalidate('products')
+    return {
+        'status_code': status.HTTP_201_CREATED,
+        'transaction': 'Stock reserved',
+        'reservations': reservations,
+        'expires_at': expires_at,
+    }
+
+
+@router.post('/reserve', status_code=status.HTTP_201_CREATED)
+async def reserve_products(db: Annotated[AsyncSession, Depends(get_db)],
+                           reserve_batch: ReserveStockBatch,
+                           get_user: Annotated[dict, Depends(get_current_user)]):
+    if not reserve_batch.items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Nothing to reserve'
+        )
+    return await reserve(db, get_user.get('id'),
+                         [(item.product_id, item.quantity) for item in reserve_batch.items])
+
+
+@router.post('/{product_id}/reserve', status_code=status.HTTP_201_CREATED)
+async def reserve_product(db: Annotated[AsyncSession, Depends(get_db)],
+                          product_id: int,
+                          reserve_stock_model: ReserveStock,
+                          get_user: Annotated[dict, Depends(get_current_user)]):
+    return await reserve(db, get_user.get('id'), [(product_id, reserve_stock_model.quantity)])
+
+
+@router.post('/reservations/{reservation_id}/release')
+async def release_product_reservation(db: Annotated[AsyncSession, Depends(get_db)],
+                                      reservation_id: int,
+                                      get_user: Annotated[dict, Depends(get_current_user)]):
+    released = await release_reservation(db, reservation_id, get_user.get('id'), bool(get_user.get('is_admin')))
+    if released['stock'] == released['quantity']:
+        # The product was sold out until now
+        await response_cache.invalidate('products')
+    return {
+        'status_code': status.HTTP_200_OK,
+        'transaction': 'Reservation released',
+        **released
+    }
+
+
+@router.post('/reservations/{reservation_id}/commit')
+async def commit_product_reservation(db: Annotated[AsyncSession, Depends(get_db)],
+                                     reservation_id: int,
+                                     get_user: Annotated[dict, Depends(get_current_user)]):
+    await commit_reservation(db, reservation_id, get_user.get('id'), bool(get_user.get('is_admin')))
+    return {
+        'status_code': status.HTTP_200_OK,
+        'transaction': 'Reservation committed',
+    }
+
+
+@router.get('/{category_slug}', response_model=ProductPage)
+@response_cache.cached('product_by_category', tags=('products', 'categories'),
+                       last_modified=category_products_last_modified)
+async def product_by_category(db: Annotated[AsyncSession, Depends(get_read_db)],
+                              request: Request,
+                              category_slug: str,
+                              order_by: ProductOrder = 'id',
+                              cursor: str | None = None,
+                              limit: PageSize = settings.PAGE_SIZE_DEFAULT):
     is_active_condition = Product.is_active
     stock_condition = Product.stock > 0
 
-    category = await db.scalar(select(Category).where(Category.slug == category_slug))
+    category_tree = await category_tree_cache.get(db)
+    categories_and_subcategories = category_tree.subtree_ids(category_slug)
 
-    if not category:
+    if not categories_and_subcategories:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Category not found")
 
-    subcategories_query = select(Category).where(Category.parent_id == category.id)
-    result = await db.scalars(subcategories_query)
-    subcategories = result.all()
-
-    categories_and_subcategories = [category.id] + [i.id for i in subcategories]
-
-    products_query = select(Product).where(Product.category_id.in_(categories_and_subcategories),
-                                           is_active_condition, stock_condition)
+    filters = [Product.category_id.in_(categories_and_subcategories), is_active_condition, stock_condition]
 
-    result = await db.scalars(products_query)
-    products_category = result.all()
+    payload = decode_cursor(cursor) if cursor is not None else None
+    result = await db.execute(product_listing_query(filters, order_by, payload, limit))
+    products_category, next_cursor = split_page(result.all(), limit, listing_cursor(order_by))
 
-    return products_category
+    return ProductPage.model_construct(items=[ProductOut.from_row(row) for row in products_category],
+                                       next_cursor=next_cursor)
 
 
-@router.get('/detail/{product_slug}')
-async def product_detail(db: Annotated[AsyncSession, Depends(get_db)], product_slug: str):
+@router.get('/detail/{product_slug}', response_model=ProductOut)
+@response_cache.cached('product_detail', tags=lambda params: ('products', f"product:{params['product_slug']}"),
+                       last_modified=product_last_modified)
+async def product_detail(db: Annotated[AsyncSession, Depends(get_read_db)], request: Request, product_slug: str):
     is_active_condition = Product.is_active
     stock_condition = Product.stock > 0
 
-    product_query = select(Product).where(Product.slug == product_slug, is_active_condition, stock_condition)
-    product = await db.scalar(product_query)
+    product_query = select(*ProductOut.columns(Product)).where(Product.slug == product_slug,
+                                                               is_active_condition, stock_condition)
+    product = (await db.execute(product_query)).first()
 
     if not product:
-        return HTTPException(
+        raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='There are no product'
         )
-    return product
+    return ProductOut.from_row(product)
 
 
 @router.put('/detail/{product_slug}')
@@ -127,6 +363,7 @@ async def update_product(db: Annotated[AsyncSession, Depends(get_db)],
 
                 await db.execute(update_query)
                 await db.commit()
+                await response_cache.invalidate('products')
                 return {
                     'status_code': status.HTTP_200_OK,
                     'transaction': 'Product update is successful'
@@ -163,6 +400,7 @@ async def delete_product(db: Annotated[AsyncSession, Depends(get_db)],
 
             await db.execute(update_query)
             await db.commit()
+            await response_cache.invalidate('products')
             return {
                 'status_code': status.HTTP_200_OK,
                 'transaction': 'Product delete is successful'
@@ -1,54 +1,78 @@
+from datetime import datetime
 
 from fastapi import APIRouter, Depends, status, HTTPException
-from sqlalchemy.dialects.mysql import insert
+from fastapi.responses import ORJSONResponse
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import insert, select, update, and_
+from sqlalchemy import insert, select, and_, or_
 
 from typing import Annotated
 
 
-from app.backend.db_depends import get_db
+from app.backend.db_depends import get_db, get_read_db
 from app.models import *
 from app.services.auth_helpers import get_current_user
-from app.schemas import CreateReview
+from app.services.cache import response_cache
+from app.services.rate_limit import limit_by_ip, limit_by_user
+from app.schemas import CreateReview, DeactivateReviews, ReviewOut, ProductReviewOut, ProductReviewPage
+from app.services.pagination import PageSize, decode_cursor, cursor_value, split_page
+from app.services.jobs import schedule_rating_refresh
+from app.services.ratings import recompute_product_ratings, deactivate_reviews
+from config import settings
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
 
-@router.get('/')
-async def all_reviews(db: Annotated[AsyncSession, Depends(get_db)]):
-    reviews_query = select(Review).where(Review.is_active)
-    results = await db.scalars(reviews_query)
-    reviews = results.all()
-    return reviews
+@router.get('/', response_model=list[ReviewOut])
+async def all_reviews(db: Annotated[AsyncSession, Depends(get_read_db)]):
+    reviews_query = select(*ReviewOut.columns(Review)).where(Review.is_active)
+    results = await db.execute(reviews_query)
+    reviews = [ReviewOut.from_row(row).model_dump() for row in results]
+    return ORJSONResponse(reviews)
 
 
 @router.get('/{product_slug}')
-async def products_reviews(db: Annotated[AsyncSession, Depends(get_db)], product_slug: str):
+async def products_reviews(db: Annotated[AsyncSession, Depends(get_read_db)],
+                           product_slug: str,
+                           cursor: str | None = None,
+                           limit: PageSize = settings.PAGE_SIZE_DEFAULT):
     is_active_condition = Review.is_active
 
-    product_query = select(Product).where(Product.slug == product_slug)
-    product = await db.scalar(product_query)
+    product_query = select(Product.id).where(Product.slug == product_slug)
+    product_id = await db.scalar(product_query)
 
-    reviews_query = select(Review).where(Review.product_id == product.id, is_active_condition)
-    reviews = await db.scalars(reviews_query)
+    if product_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='There is no product found')
 
-    result = []
-    for review in reviews:
+    reviews_query = (select(Review.id, Review.comment, Review.comment_date, Rating.grade)
+                     .outerjoin(Review.rating)
+                     .where(Review.product_id == product_id, is_active_condition))
 
-        rating_query = select(Rating).where(Rating.id == review.rating_id)
-        rating = await db.scalar(rating_query)
+    if cursor is not None:
+        payload = decode_cursor(cursor)
+        last_date = cursor_value(payload, 'comment_date', datetime.fromisoformat)
+        last_id = cursor_value(payload, 'id')
+        reviews_query = reviews_query.where(or_(Review.comment_date < last_date,
+                                                and_(Review.comment_date == last_date, Review.id < last_id)))
 
-        result.append({
-            'review': review.comment,
-            'grade': rating.grade if rating else None
-        })
+    reviews_query = reviews_query.order_by(Review.comment_date.desc(), Review.id.desc()).limit(limit + 1)
+    reviews = await db.execute(reviews_query)
 
-    return result if result else {'message': 'No reviews found'}
+    page, next_cursor = split_page(reviews.all(), limit,
+                                   lambda row: {'comment_date': row.comment_date.isoformat(), 'id': row.id})
 
+    result = [ProductReviewOut.model_construct(review=review.comment,
+                                               grade=review.grade,
+                                               comment_date=review.comment_date) for review in page]
 
-@router.post('create')
+    if not result and cursor is None:
+        return {'message': 'No reviews found'}
+    return ORJSONResponse(ProductReviewPage.model_construct(items=result, next_cursor=next_cursor).model_dump())
+
+
+@router.post('create', dependencies=[Depends(limit_by_ip('review_ip')), Depends(limit_by_user('review_user'))])
 async def add_review(db: Annotated[AsyncSession, Depends(get_db)],
                      get_user: Annotated[dict, Depends(get_current_user)],
                      create_review: CreateReview,
@@ -77,17 +101,8 @@ async def add_review(db: Annotated[AsyncSession, Depends(get_db)],
 
         await db.execute(review_create)
         await db.commit()
-
-        ratings_query = select(Rating.grade).where(Rating.product_id == product.id)
-        ratings = await db.scalars(ratings_query)
-        ratings_list = ratings.all()
-
-        average_rating = sum(ratings_list) / len(ratings_list)
-
-
-        update_product = product.__table__.update().where(Product.id == product.id).values(rating=average_rating)
-        await db.execute(update_product)
-        await db.commit()
+        # The aggregate and cached pages catch up after the response; a burst of reviews shares one refresh
+        await schedule_rating_refresh(product.id)
 
         return {
             'status_code': status.HTTP_201_CREATED,
@@ -121,28 +136,64 @@ async def delete_review(db: Annotated[AsyncSession,
             detail='You are not authorized to use this method'
         )
 
-    review_query = select(Review).where(Review.product_id == product.id)
-    reviews = await db.scalars(review_query)
+    ratings_deactivated, reviews_deactivated = await deactivate_reviews(db, [product.id])
 
-    if not reviews:
+    if not reviews_deactivated:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='No reviews found for this product'
         )
 
-    for review in reviews:
-        update_rating_query = update(Rating).where(Rating.id == review.rating_id).values(is_active=False)
-        await db.execute(update_rating_query)
+    await db.commit()
+    await schedule_rating_refresh(product.id)
+
+    return {
+        'status_code': status.HTTP_200_OK,
+        'transaction': 'Product reviews and ratings deactivation is successful',
+        'ratings_deactivated': ratings_deactivated,
+        'reviews_deactivated': reviews_deactivated
+    }
 
-        update_review_query = update(Review).where(Review.id == review.id).values(is_active=False)
-        await db.execute(update_review_query)
 
+@router.post('/deactivate')
+async def deactivate_products_reviews(db: Annotated[AsyncSession, Depends(get_db)],
+                                      deactivate: DeactivateReviews,
+                                      get_user: Annotated[dict, Depends(get_current_user)]):
+    if not get_user.get('is_admin'):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='You are not authorized to use this method'
+        )
+
+    ratings_deactivated, reviews_deactivated = await deactivate_reviews(db, deactivate.product_ids)
     await db.commit()
+    # The refresh invalidates the cached pages once the aggregates have changed
+    await schedule_rating_refresh(*deactivate.product_ids)
 
     return {
         'status_code': status.HTTP_200_OK,
-        'transaction': 'Product reviews and ratings deactivation is successful'
+        'transaction': 'Product reviews and ratings deactivation is successful',
+        'ratings_deactivated': ratings_deactivated,
+        'reviews_deactivated': reviews_deactivated
     }
 
 
+@router.post('/recompute_ratings')
+async def recompute_ratings(db: Annotated[AsyncSession, Depends(get_db)],
+                            get_user: Annotated[dict, Depends(get_current_user)]):
+    if not get_user.get('is_admin'):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='You are not authorized to use this method'
+        )
+
+    updated = await recompute_product_ratings(db)
+    await db.commit()
+    await response_cache.invalidate('products')
 
+    return {
+        'status_code': status.HTTP_200_OK,
+        'transaction': 'Product ratings recompute is successful',
+        'updated': updated
+    }
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PositiveInt, model_validator
 
 
 
@@ -13,6 +13,34 @@ class CreateProduct(BaseModel):
     category_id: int
 
 
+class BulkProductUpdate(BaseModel):
+    id: int | None = None
+    slug: str | None = None
+    stock: int | None = None
+    price: int | None = None
+
+    @model_validator(mode='after')
+    def check_fields(self):
+        if (self.id is None) == (self.slug is None):
+            raise ValueError('Give either id or slug')
+        if self.stock is None and self.price is None:
+            raise ValueError('Give stock, price or both')
+        return self
+
+
+class ReserveStock(BaseModel):
+    quantity: PositiveInt = 1
+
+
+class ReservationItem(BaseModel):
+    product_id: int
+    quantity: PositiveInt = 1
+
+
+class ReserveStockBatch(BaseModel):
+    items: list[ReservationItem]
+
+
 class CreateCategory(BaseModel):
     name: str
     parent_id: int | None
@@ -26,9 +54,100 @@ class CreateUser(BaseModel):
     password: str
 
 
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+
 class CreateReview(BaseModel):
     comment: str
     grade: int
 
 
+class DeactivateReviews(BaseModel):
+    product_ids: list[int]
+
+
+class RowModel(BaseModel):
+    """Response schema filled straight from a column-only ``select`` row, skipping ORM entities."""
+
+    @classmethod
+    def columns(cls, entity) -> list:
+        return [getattr(entity, name) for name in cls.model_fields]
+
+    @classmethod
+    def from_row(cls, row):
+        # Rows come from typed columns, so validation would only repeat work the database already did
+        return cls.model_construct(**row._mapping)
+
+
+class ProductOut(RowModel):
+    id: int
+    name: str | None
+    slug: str | None
+    description: str | None
+    price: int | None
+    image_url: str | None
+    stock: int | None
+    supplier_id: int | None
+    rating: float | None
+    rating_count: int
+    is_active: bool | None
+    category_id: int | None
+    updated_at: datetime | None
+
+
+class ProductPage(BaseModel):
+    items: list[ProductOut]
+    next_cursor: str | None
+
+
+class CategoryFacet(BaseModel):
+    category_id: int | None
+    count: int
+
+
+class PriceRangeFacet(BaseModel):
+    min: int | None
+    max: int | None
+    count: int
+
+
+class SearchFacets(BaseModel):
+    categories: list[CategoryFacet]
+    price_ranges: list[PriceRangeFacet]
+
+
+class ProductSearchPage(BaseModel):
+    items: list[ProductOut]
+    next_cursor: str | None
+    facets: SearchFacets | None
+
+
+class CategoryOut(RowModel):
+    id: int
+    name: str | None
+    slug: str | None
+    is_active: bool | None
+    parent_id: int | None
+    updated_at: datetime | None
+
+
+class ReviewOut(RowModel):
+    id: int
+    user_id: int | None
+    product_id: int | None
+    rating_id: int | None
+    comment: str | None
+    comment_date: datetime | None
+    is_active: bool | None
+
+
+class ProductReviewOut(BaseModel):
+    review: str | None
+    grade: int | None
+    comment_date: datetime | None
+
 
+class ProductReviewPage(BaseModel):
+    items: list[ProductReviewOut]
+    next_cursor: str | None
@@ -0,0 +1,102 @@
+import os
+import queue
+import random
+import threading
+
+import orjson
+
+from config import settings
+
+
+class AccessLogWriter:
+    """JSON-lines access log written from a background thread in batches, rotated by size.
+
+    Requests only pay for a non-blocking queue put; when the queue is full the record is dropped
+    and counted rather than slowing the request down.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backups: int, batch_size: int,
+                 flush_interval: float, queue_size: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def write(self, record: dict):
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 5):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='access-log', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        stream = open(self.path, 'ab')
+        try:
+            while True:
+                try:
+                    batch = [self._queue.get(timeout=self.flush_interval)]
+                except queue.Empty:
+                    continue
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                closing = None in batch
+                stream.write(b''.join(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+                                      for record in batch if record is not None))
+                stream.flush()
+                if stream.tell() >= self.max_bytes:
+                    stream.close()
+                    self._rotate()
+                    stream = open(self.path, 'ab')
+                if closing:
+                    return
+        finally:
+            stream.close()
+
+    def _rotate(self):
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f'{self.path}.{index}'):
+                os.replace(f'{self.path}.{index}', f'{self.path}.{index + 1}')
+        if self.backups > 0:
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.remove(self.path)
+
+
+def should_log(status_code: int, duration_ms: float) -> bool:
+    # Failures and slow requests are always kept; only routine successes are sampled
+    if status_code >= 300 or duration_ms >= settings.ACCESS_LOG_SLOW_MS:
+        return True
+    rate = settings.ACCESS_LOG_SAMPLE_RATE
+    return rate >= 1 or random.random() < rate
+
+
+access_log = AccessLogWriter(
+    path=settings.ACCESS_LOG_PATH,
+    max_bytes=settings.ACCESS_LOG_MAX_BYTES,
+    backups=settings.ACCESS_LOG_BACKUPS,
+    batch_size=settings.ACCESS_LOG_BATCH_SIZE,
+    flush_interval=settings.ACCESS_LOG_FLUSH_INTERVAL,
+    queue_size=settings.ACCESS_LOG_QUEUE_SIZE,
+)
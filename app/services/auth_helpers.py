@@ -4,18 +4,20 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from typing import Annotated
-from datetime import datetime, timedelta
-from jose import jwt, JWTError
+from datetime import datetime, timedelta, timezone
+import time
+from jose import jwt, JWTError, ExpiredSignatureError
 
 from app.models.user import User
 from app.backend.db_depends import get_db
 from config import settings
-from app.services.security import oauth2_scheme, bcrypt_context
+from app.services.security import oauth2_scheme, verify_password
+from app.services.token_cache import token_cache, revocation_list
 
 
 async def authenticate_user(db: Annotated[AsyncSession, Depends(get_db)], username: str, password: str):
     user = await db.scalar(select(User).where(User.username == username))
-    if not user or not bcrypt_context.verify(password, user.hashed_password) or user.is_active == False:
+    if not user or not await verify_password(password, user.hashed_password) or user.is_active == False:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
@@ -32,45 +34,66 @@ async def create_access_token(username: str,
                               expires_delta: timedelta):
 
     encode = {'sub': username, 'id': user_id, 'is_admin': is_admin, 'is_supplier': is_supplier, 'is_customer': is_customer}
-    expires = datetime.now() + expires_delta
+    expires = datetime.now(timezone.utc) + expires_delta
     encode.update({'exp': expires})
     return jwt.encode(encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
 async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
+    user = token_cache.get(token)
+    if user is None:
+        user, expire = decode_access_token(token)
+        token_cache.set(token, user, expire)
+
+    if await revocation_list.is_revoked(user['id']):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='Could not validate user'
+        )
+    # Handlers get their own copy so nothing they do can leak into the cached claims
+    return dict(user)
+
+
+def decode_access_token(token: str) -> tuple[dict, float]:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get('sub')
-        user_id: int = payload.get('id')
-        is_admin: str = payload.get('is_admin')
-        is_supplier: str = payload.get('is_supplier')
-        is_customer: str = payload.get('is_customer')
-        expire = payload.get('exp')
-        if username is None or user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail='Could not validate user'
-            )
-        if expire is None:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No access token supplied"
-            )
-        if datetime.now() > datetime.fromtimestamp(expire):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Token expired!"
-            )
-
-        return {
-            'username': username,
-            'id': user_id,
-            'is_admin': is_admin,
-            'is_supplier': is_supplier,
-            'is_customer': is_customer,
-        }
+    except ExpiredSignatureError:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Token expired!"
+        )
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='Could not validate user'
-        )
\ No newline at end of file
+        )
+    username: str = payload.get('sub')
+    user_id: int = payload.get('id')
+    is_admin: str = payload.get('is_admin')
+    is_supplier: str = payload.get('is_supplier')
+    is_customer: str = payload.get('is_customer')
+    expire = payload.get('exp')
+    if username is None or user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='Could not validate user'
+        )
+    if expire is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No access token supplied"
+        )
+    # exp is a UTC epoch timestamp, so compare it against epoch time rather than local wall-clock time
+    if time.time() >= expire:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Token expired!"
+        )
+
+    return {
+        'username': username,
+        'id': user_id,
+        'is_admin': is_admin,
+        'is_supplier': is_supplier,
+        'is_customer': is_customer,
+    }, expire
@@ -0,0 +1,244 @@
+import codecs
+import csv
+import secrets
+import time
+
+import orjson
+from pydantic import ValidationError
+from slugify import slugify
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import *
+from app.schemas import CreateProduct
+from app.services.category_tree import category_tree_cache
+from config import settings
+
+
+CSV_TYPES = {'text/csv', 'application/csv'}
+NDJSON_TYPES = {'application/x-ndjson', 'application/ndjson', 'application/jsonl'}
+
+# Suffix probes per batch before falling back to a random suffix
+SLUG_ROUNDS = 8
+
+# csv refuses fields over 128 KiB by default; a single field may use up the whole record allowance
+csv.field_size_limit(max(csv.field_size_limit(), settings.BULK_IMPORT_MAX_RECORD_BYTES))
+
+
+class UploadError(ValueError):
+    pass
+
+
+def upload_format(content_type: str | None) -> str | None:
+    media_type = (content_type or '').split(';')[0].strip().lower()
+    if media_type in CSV_TYPES:
+        return 'csv'
+    if media_type in NDJSON_TYPES:
+        return 'ndjson'
+    return None
+
+
+async def iter_line_batches(chunks):
+    """Yield the complete lines decoded from each chunk as one list; the line in progress waits for the next."""
+    # utf-8-sig drops the BOM spreadsheet exports like to start with
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ''
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split('\n')
+        if lines:
+            yield [line.rstrip('\r') for line in lines]
+        if len(pending) > settings.BULK_IMPORT_MAX_RECORD_BYTES:
+            raise UploadError('Line is too long')
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield [pending.rstrip('\r')]
+
+
+def split_csv_records(lines: list[str]) -> tuple[list[list[str]], list[str], str | None]:
+    """Parse ``lines`` with one csv.reader; returns the finished records, the lines of a trailing
+    record that is still inside a quoted field, and the error that stopped the reader, if any."""
+    exhausted = False
+
+    def feed():
+        nonlocal exhausted
+        for line in lines:
+            yield line + '\n'
+        # The reader only asks past the last line when a quoted field is still open
+        exhausted = True
+
+    reader = csv.reader(feed())
+    records = []
+    start = 0
+    try:
+        for values in reader:
+            if exhausted:
+                return records, lines[start:], None
+            records.append(values)
+            start = reader.line_num
+    except csv.Error as ex:
+        return records, [], str(ex)
+    return records, [], None
+
+
+async def iter_csv_records(batches):
+    """Yield (row number, fields or None, error or None); quoted fields may span lines and chunks."""
+    header = None
+    row_number = 0
+    carried = []
+    async for batch in batches:
+        records, carried, error = split_csv_records(carried + batch)
+        for values in records:
+            if len(values) <= 1 and not ''.join(values).strip():
+                continue
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            row_number += 1
+            if len(values) != len(header):
+                yield row_number, None, f'Expected {len(header)} columns, got {len(values)}'
+            else:
+                yield row_number, dict(zip(header, values)), None
+        if error is not None:
+            raise UploadError(f'Row {row_number + 1} could not be parsed: {error}')
+        if sum(map(len, carried)) > settings.BULK_IMPORT_MAX_RECORD_BYTES:
+            raise UploadError(f'Row {row_number + 1} has an unterminated quoted field')
+    if carried:
+        raise UploadError(f'Row {row_number + 1} has an unterminated quoted field')
+
+
+async def iter_ndjson_records(batches):
+    row_number = 0
+    async for batch in batches:
+        for line in batch:
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                data = orjson.loads(line)
+            except orjson.JSONDecodeError as ex:
+                yield row_number, None, f'Invalid JSON: {ex}'
+                continue
+            if not isinstance(data, dict):
+                yield row_number, None, 'Expected a JSON object'
+                continue
+            yield row_number, data, None
+
+
+class ProductImport:
+    """Validates rows, gives each a unique slug and inserts them in batches, one commit per batch."""
+
+    def __init__(self, db: AsyncSession, supplier_id: int, category_ids: set[int]):
+        self.db = db
+        self.supplier_id = supplier_id
+        self.category_ids = category_ids
+        self.batch: list[tuple[int, str, dict]] = []
+        self.rows = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+        self.taken_slugs: set[str] = set()
+        self.next_suffix: dict[str, int] = {}
+
+    def add_error(self, row_number: int, *messages: str):
+        self.failed += 1
+        if len(self.errors) < settings.BULK_IMPORT_MAX_ERRORS:
+            self.errors.append({'row': row_number, 'errors': list(messages)})
+
+    async def add(self, row_number: int, data: dict | None, error: str | None):
+        self.rows += 1
+        if error is not None:
+            self.add_error(row_number, error)
+            return
+        try:
+            product = CreateProduct.model_validate(data)
+        except ValidationError as ex:
+            self.add_error(row_number, *(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in ex.errors()))
+            return
+        if product.category_id not in self.category_ids:
+            self.add_error(row_number, f'category_id: Category {product.category_id} does not exist')
+            return
+
+        values = product.model_dump()
+        values['supplier_id'] = self.supplier_id
+        self.batch.append((row_number, slugify(product.name) or 'product', values))
+        if len(self.batch) >= settings.BULK_IMPORT_BATCH_SIZE:
+            await self.flush()
+
+    def propose_slug(self, base: str) -> str:
+        suffix = self.next_suffix.get(base, 1)
+        self.next_suffix[base] = suffix + 1
+        return base if suffix == 1 else f'{base}-{suffix}'
+
+    async def assign_slugs(self, batch: list[tuple[int, str, dict]]):
+        # Try the next free suffix for every row at once and check all proposals with a single query per round
+        unresolved = batch
+        for _ in range(SLUG_ROUNDS):
+            if not unresolved:
+                return
+            proposed = {}
+            retry = []
+            for item in unresolved:
+                slug = self.propose_slug(item[1])
+                if slug in proposed or slug in self.taken_slugs:
+                    retry.append(item)
+                else:
+                    proposed[slug] = item
+            existing = set(await self.db.scalars(select(Product.slug).where(Product.slug.in_(proposed))))
+            for slug, item in proposed.items():
+                if slug in existing:
+                    retry.append(item)
+                else:
+                    item[2]['slug'] = slug
+                    self.taken_slugs.add(slug)
+            unresolved = retry
+        for _, base, values in unresolved:
+            values['slug'] = f'{base}-{secrets.token_hex(4)}'
+            self.taken_slugs.add(values['slug'])
+
+    async def flush(self):
+        batch, self.batch = self.batch, []
+        if not batch:
+            return
+        await self.assign_slugs(batch)
+        try:
+            await self.db.execute(insert(Product).values([values for _, _, values in batch]))
+            await self.db.commit()
+        except IntegrityError:
+            # Another writer took one of the slugs between the check and the insert
+            await self.db.rollback()
+            for row_number, _, _ in batch:
+                self.add_error(row_number, 'Conflicted with a concurrent write, retry this row')
+            return
+        self.inserted += len(batch)
+
+
+async def import_products(db: AsyncSession, chunks, upload: str, supplier_id: int) -> dict:
+    started = time.perf_counter()
+    category_tree = await category_tree_cache.get(db)
+    product_import = ProductImport(db, supplier_id, category_tree.ids)
+
+    records = iter_csv_records if upload == 'csv' else iter_ndjson_records
+    aborted = None
+    try:
+        async for row_number, data, error in records(iter_line_batches(chunks)):
+            await product_import.add(row_number, data, error)
+    except UploadError as ex:
+        aborted = str(ex)
+    except UnicodeDecodeError:
+        aborted = 'Upload is not valid UTF-8'
+    # Rows parsed before a fatal error are still worth keeping
+    await product_import.flush()
+
+    seconds = time.perf_counter() - started
+    return {
+        'rows': product_import.rows,
+        'inserted': product_import.inserted,
+        'failed': product_import.failed,
+        'errors': product_import.errors,
+        'errors_truncated': product_import.failed > len(product_import.errors),
+        'aborted': aborted,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(product_import.rows / seconds) if seconds else None,
+    }
@@ -0,0 +1,58 @@
+from sqlalchemy import Integer, String, cast, column, func, literal, select, union_all, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import *
+from app.schemas import BulkProductUpdate
+from config import settings
+
+
+def changes_source(db: AsyncSession, key_type, rows: list[tuple]):
+    if db.bind.dialect.name == 'postgresql':
+        return values(column('key', key_type), column('stock', Integer), column('price', Integer),
+                      name='changes').data(rows)
+    # Other backends cannot name the columns of a VALUES list, so build the same relation from SELECTs
+    return union_all(*(select(literal(key, key_type).label('key'),
+                              literal(stock, Integer).label('stock'),
+                              literal(price, Integer).label('price'))
+                       for key, stock, price in rows)).subquery('changes')
+
+
+async def update_batch(db: AsyncSession, key_column, key_type, rows: list[tuple],
+                       user_id: int, is_admin: bool) -> tuple[int, int, int]:
+    changes = changes_source(db, key_type, rows)
+    ownership = [] if is_admin else [Product.supplier_id == user_id]
+    # The casts keep a column of nothing but NULLs from being typed as text on PostgreSQL
+    query = (update(Product)
+             .where(key_column == changes.c.key, *ownership)
+             .values(stock=func.coalesce(cast(changes.c.stock, Integer), Product.stock),
+                     price=func.coalesce(cast(changes.c.price, Integer), Product.price))
+             .returning(key_column)
+             .execution_options(synchronize_session=False))
+    updated = set(await db.scalars(query))
+
+    missing = [key for key, _, _ in rows if key not in updated]
+    forbidden = 0
+    if missing and not is_admin:
+        # Anything that exists but was not updated belongs to another supplier
+        forbidden = len(set(await db.scalars(select(key_column).where(key_column.in_(missing)))))
+    return len(updated), len(missing) - forbidden, forbidden
+
+
+async def apply_product_updates(db: AsyncSession, updates: list[BulkProductUpdate],
+                                user_id: int, is_admin: bool) -> dict:
+    # A later entry for the same product replaces an earlier one
+    by_id = {item.id: (item.stock, item.price) for item in updates if item.id is not None}
+    by_slug = {item.slug: (item.stock, item.price) for item in updates if item.id is None}
+    counts = {'updated': 0, 'skipped': len(updates) - len(by_id) - len(by_slug), 'forbidden': 0}
+
+    batch_size = settings.BULK_UPDATE_BATCH_SIZE
+    for key_column, key_type, changes in ((Product.id, Integer, by_id), (Product.slug, String, by_slug)):
+        rows = [(key, stock, price) for key, (stock, price) in changes.items()]
+        for start in range(0, len(rows), batch_size):
+            updated, skipped, forbidden = await update_batch(db, key_column, key_type,
+                                                             rows[start:start + batch_size], user_id, is_admin)
+            await db.commit()
+            counts['updated'] += updated
+            counts['skipped'] += skipped
+            counts['forbidden'] += forbidden
+    return counts
@@ -0,0 +1,186 @@
+import functools
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Iterable
+from urllib.parse import urlencode
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from app.backend.replicas import replica_router
+from app.services.conditional import conditional_response, make_etag, to_utc
+from config import settings
+
+
+class InMemoryCache:
+    """LRU + TTL cache kept per worker, with a tag -> keys index for invalidation."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, bytes, tuple[str, ...]]] = OrderedDict()
+        self._keys_by_tag: dict[str, set[str]] = defaultdict(set)
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if expires_at < time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, tags: Iterable[str]):
+        tags = tuple(tags)
+        self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+        for tag in tags:
+            self._keys_by_tag[tag].add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    async def invalidate_tags(self, *tags: str):
+        for tag in tags:
+            for key in self._keys_by_tag.pop(tag, ()):
+                self._drop(key)
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+
+class RedisCache:
+    """Shared cache on any client exposing the redis.asyncio get/set/sadd/expire/smembers/delete calls."""
+
+    def __init__(self, client, ttl: float, prefix: str = 'cache:'):
+        self.client = client
+        self.ttl = int(ttl)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes, tags: Iterable[str]):
+        await self.client.set(self.prefix + key, value, ex=self.ttl)
+        for tag in tags:
+            tag_key = f'{self.prefix}tag:{tag}'
+            await self.client.sadd(tag_key, self.prefix + key)
+            await self.client.expire(tag_key, self.ttl)
+
+    async def invalidate_tags(self, *tags: str):
+        for tag in tags:
+            tag_key = f'{self.prefix}tag:{tag}'
+            keys = await self.client.smembers(tag_key)
+            await self.client.delete(tag_key, *keys)
+
+
+def cache_key(namespace: str, params: dict) -> str:
+    # Sessions, requests and other injected objects are not part of the key
+    key_params = sorted((name, value) for name, value in params.items()
+                        if value is not None and isinstance(value, (str, int, float, bool)))
+    return f'{namespace}?{urlencode(key_params)}'
+
+
+def render(result) -> bytes:
+    if isinstance(result, BaseModel):
+        return orjson.dumps(result.model_dump())
+    if isinstance(result, list) and all(isinstance(item, BaseModel) for item in result):
+        return orjson.dumps([item.model_dump() for item in result])
+    return orjson.dumps(jsonable_encoder(result))
+
+
+def pack_entry(body: bytes, etag: str, last_modified: datetime | None) -> bytes:
+    timestamp = str(int(last_modified.timestamp())) if last_modified is not None else ''
+    return f'{etag} {timestamp}\n'.encode() + body
+
+
+def unpack_entry(entry: bytes) -> tuple[bytes, str, datetime | None]:
+    header, _, body = entry.partition(b'\n')
+    etag, _, timestamp = header.decode().partition(' ')
+    last_modified = datetime.fromtimestamp(int(timestamp), timezone.utc) if timestamp else None
+    return body, etag, last_modified
+
+
+class ResponseCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        # Bumped on every invalidation so a load that raced with a write is not stored
+        self._generation = 0
+
+    def cached(self, namespace: str,
+               tags: Iterable[str] | Callable[[dict], Iterable[str]],
+               last_modified: Callable[[dict], Awaitable[datetime | None]] | None = None):
+        """Serve the endpoint's JSON from the cache, with an ETag and, if given, a Last-Modified header.
+
+        ``last_modified`` receives the endpoint kwargs and returns the newest ``updated_at`` behind
+        the response. It runs before the endpoint, so a concurrent write can only make the header
+        older than the body, never newer. Endpoints that declare ``request: Request`` get 304s.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(**kwargs):
+                request = kwargs.get('request')
+                key = cache_key(namespace, kwargs)
+                entry = await self.backend.get(key)
+                if entry is not None:
+                    self.hits += 1
+                    return conditional_response(request, *unpack_entry(entry))
+
+                self.misses += 1
+                generation = self._generation
+                modified = to_utc(await last_modified(kwargs)) if last_modified is not None else None
+                result = await func(**kwargs)
+                if isinstance(result, Response):
+                    return result
+
+                body = render(result)
+                etag = make_etag(body)
+                if generation == self._generation:
+                    await self.backend.set(key, pack_entry(body, etag, modified),
+                                           tags(kwargs) if callable(tags) else tags)
+                return conditional_response(request, body, etag, modified)
+
+            return wrapper
+
+        return decorator
+
+    async def invalidate(self, *tags: str):
+        self._generation += 1
+        replica_router.invalidated()
+        await self.backend.invalidate_tags(*tags)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+
+def create_backend():
+    if settings.CACHE_BACKEND == 'redis':
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError('CACHE_BACKEND=redis requires the redis package')
+        return RedisCache(redis.from_url(settings.CACHE_REDIS_URL), ttl=settings.CACHE_TTL)
+    return InMemoryCache(max_entries=settings.CACHE_MAX_ENTRIES, ttl=settings.CACHE_TTL)
+
+
+response_cache = ResponseCache(create_backend())
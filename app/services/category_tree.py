@@ -0,0 +1,73 @@
+import asyncio
+import time
+from collections import defaultdict
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.category import Category
+from config import settings
+
+
+class CategoryTree:
+    def __init__(self, rows):
+        self.ids_by_slug: dict[str, int] = {}
+        self.ids: set[int] = set()
+        self.children: dict[int, list[int]] = defaultdict(list)
+        for category_id, slug, parent_id in rows:
+            self.ids_by_slug[slug] = category_id
+            self.ids.add(category_id)
+            if parent_id is not None:
+                self.children[parent_id].append(category_id)
+
+    def subtree_ids(self, slug: str) -> list[int] | None:
+        root_id = self.ids_by_slug.get(slug)
+        if root_id is None:
+            return None
+
+        result = [root_id]
+        seen = {root_id}
+        stack = [root_id]
+        while stack:
+            for child_id in self.children.get(stack.pop(), ()):
+                # parent_id is not constrained against cycles, so guard against them
+                if child_id not in seen:
+                    seen.add(child_id)
+                    result.append(child_id)
+                    stack.append(child_id)
+        return result
+
+
+class CategoryTreeCache:
+    """Per-worker copy of the category tree, rebuilt on the first read after a write or after the TTL."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._tree: CategoryTree | None = None
+        self._loaded_at = 0.0
+        self._version = 0
+        self._lock = asyncio.Lock()
+
+    async def get(self, db: AsyncSession) -> CategoryTree:
+        tree = self._tree
+        if tree is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return tree
+
+        async with self._lock:
+            if self._tree is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return self._tree
+            version = self._version
+            rows = await db.execute(select(Category.id, Category.slug, Category.parent_id))
+            tree = CategoryTree(rows.all())
+            # An invalidation that raced with the load leaves the cache empty so the next read reloads
+            if version == self._version:
+                self._tree = tree
+                self._loaded_at = time.monotonic()
+            return tree
+
+    def invalidate(self):
+        self._version += 1
+        self._tree = None
+
+
+category_tree_cache = CategoryTreeCache(ttl=settings.CATEGORY_TREE_TTL)
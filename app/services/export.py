@@ -0,0 +1,53 @@
+import csv
+import io
+import zlib
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models import *
+from app.schemas import ProductOut
+from config import settings
+
+
+EXPORT_MEDIA_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def export_query():
+    return (select(*ProductOut.columns(Product))
+            .where(Product.is_active)
+            .order_by(Product.id)
+            .execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+
+
+def ndjson_chunk(rows) -> bytes:
+    return b''.join(orjson.dumps(dict(row._mapping), option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+
+
+def csv_chunk(rows) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def export_products(session_maker: async_sessionmaker, export_format: str, compress: bool):
+    """Yield the active catalog one ``yield_per`` partition at a time, so memory does not grow with it."""
+    compressor = zlib.compressobj(settings.EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None
+
+    def encode(chunk: bytes) -> bytes:
+        return compressor.compress(chunk) if compressor is not None else chunk
+
+    if export_format == 'csv':
+        yield encode(csv_chunk([list(ProductOut.model_fields)]))
+    to_chunk = csv_chunk if export_format == 'csv' else ndjson_chunk
+
+    async with session_maker() as session:
+        result = await session.stream(export_query())
+        async for rows in result.partitions():
+            chunk = encode(to_chunk(rows))
+            if chunk:
+                yield chunk
+
+    if compressor is not None:
+        yield compressor.flush()
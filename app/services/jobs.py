@@ -0,0 +1,22 @@
+"""Post-write jobs and the helpers routes use to schedule them."""
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.cache import response_cache
+from app.services.ratings import recompute_product_ratings
+from app.services.tasks import task, task_queue
+
+
+@task('refresh_product_rating')
+async def refresh_product_rating(db: AsyncSession, product_id: int):
+    # Recomputed from the ratings table, so however many submissions were coalesced, one indexed
+    # aggregate over the product's active ratings is enough
+    if not await recompute_product_ratings(db, [product_id]):
+        return
+    await db.commit()
+    # Listings, search results and the detail page all show, sort or filter by the rating
+    await response_cache.invalidate('products')
+
+
+async def schedule_rating_refresh(*product_ids: int):
+    for product_id in product_ids:
+        await task_queue.submit('refresh_product_rating', key=str(product_id), product_id=product_id)
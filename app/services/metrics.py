@@ -0,0 +1,145 @@
+"""Prometheus text-format collectors, small enough to leave on under full load.
+
+Every update happens on the event loop thread (SQLAlchemy cursor events included), so plain
+dict and list updates need no locks.
+"""
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list['Metric'] = []
+
+    def register(self, metric: 'Metric'):
+        self.metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class Metric:
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        registry.register(self)
+
+    def header(self) -> list[str]:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type_name}']
+
+
+class Counter(Metric):
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def set(self, labels: tuple, value: float):
+        # For totals kept elsewhere (pool, cache) and copied in when scraped
+        self.values[labels] = value
+
+    def render(self) -> list[str]:
+        return [f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}'
+                for labels, value in self.values.items()]
+
+
+class Gauge(Counter):
+    type_name = 'gauge'
+
+    def dec(self, labels: tuple = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+
+class Histogram(Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum]; made cumulative only when rendered
+        self.series: dict[tuple, list] = {}
+
+    def observe(self, value: float, labels: tuple = ()):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> list[str]:
+        lines = []
+        for labels, (counts, total) in self.series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == '+Inf' else f'le="{_number(bound)}"'
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}')
+        return lines
+
+
+http_request_duration = Histogram('http_request_duration_seconds', 'Request latency by route template and status',
+                                  ('method', 'route', 'status'))
+http_requests_in_flight = Gauge('http_requests_in_flight', 'Requests currently being served')
+db_statements_per_request = Histogram('db_statements_per_request', 'SQL statements issued per request',
+                                      ('route',), buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100))
+db_time_per_request = Histogram('db_request_duration_seconds', 'Time spent in SQL per request', ('route',))
+db_statement_duration = Histogram('db_statement_duration_seconds', 'Latency of single SQL statements')
+
+db_pool_size = Gauge('db_pool_size', 'Configured pool size', ('pool',))
+db_pool_checked_out = Gauge('db_pool_checked_out', 'Connections currently checked out', ('pool',))
+db_pool_overflow = Gauge('db_pool_overflow', 'Connections open beyond the pool size', ('pool',))
+db_pool_checkouts = Counter('db_pool_checkouts_total', 'Connection checkouts since start', ('pool',))
+db_pool_timeouts = Counter('db_pool_timeouts_total', 'Checkouts that timed out waiting', ('pool',))
+db_pool_wait = Counter('db_pool_wait_seconds_total', 'Time spent waiting for a connection', ('pool',))
+cache_hits = Counter('response_cache_hits_total', 'Response cache hits')
+cache_misses = Counter('response_cache_misses_total', 'Response cache misses')
+
+
+def observe_request(method: str, route: str, status: int, seconds: float, statements: int, db_seconds: float):
+    http_request_duration.observe(seconds, (method, route, str(status)))
+    db_statements_per_request.observe(statements, (route,))
+    db_time_per_request.observe(db_seconds, (route,))
+
+
+def observe_pool(name: str, snapshot: dict):
+    labels = (name,)
+    db_pool_checkouts.set(labels, snapshot['checkouts'])
+    db_pool_timeouts.set(labels, snapshot['timeouts'])
+    db_pool_wait.set(labels, snapshot['wait_seconds_total'])
+    if 'size' in snapshot:
+        db_pool_size.set(labels, snapshot['size'])
+        db_pool_checked_out.set(labels, snapshot['checked_out'])
+        db_pool_overflow.set(labels, snapshot['overflow'])
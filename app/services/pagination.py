@@ -0,0 +1,47 @@
+import base64
+import json
+from typing import Annotated, Any, Sequence
+
+from fastapi import HTTPException, Query, status
+
+from config import settings
+
+
+PageSize = Annotated[int, Query(ge=1, le=settings.PAGE_SIZE_MAX)]
+
+
+def encode_cursor(payload: dict[str, Any]) -> str:
+    raw = json.dumps(payload, separators=(',', ':'), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError):
+        payload = None
+    if not isinstance(payload, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Invalid cursor'
+        )
+    return payload
+
+
+def cursor_value(payload: dict[str, Any], key: str, cast=int):
+    try:
+        return cast(payload[key])
+    except (KeyError, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Invalid cursor'
+        )
+
+
+def split_page(rows: Sequence, limit: int, make_cursor) -> tuple[list, str | None]:
+    """Rows are fetched with ``limit + 1`` so the extra row tells us whether there is a next page."""
+    items = list(rows[:limit])
+    if len(rows) > limit:
+        return items, encode_cursor(make_cursor(items[-1]))
+    return items, None
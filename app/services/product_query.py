@@ -0,0 +1,85 @@
+import time
+from typing import Literal
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import *
+from app.schemas import ProductOut
+from app.services.pagination import cursor_value
+from config import settings
+
+
+ProductOrder = Literal['id', 'price', '-price', 'rating', '-rating']
+
+# order_by -> (column, descending, cursor value type)
+SORTS = {
+    'id': (Product.id, False, int),
+    'price': (Product.price, False, int),
+    '-price': (Product.price, True, int),
+    'rating': (Product.rating, False, float),
+    '-rating': (Product.rating, True, float),
+}
+
+_row_estimate = (0, 0.0)
+
+
+async def estimate_product_rows(db: AsyncSession) -> int:
+    global _row_estimate
+    estimate, expires_at = _row_estimate
+    if time.monotonic() < expires_at:
+        return estimate
+
+    if db.bind.dialect.name == 'postgresql':
+        estimate = await db.scalar(text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'products'"))
+    else:
+        estimate = await db.scalar(select(func.count(Product.id)))
+    _row_estimate = (max(estimate or 0, 0), time.monotonic() + settings.PRODUCT_ROW_ESTIMATE_TTL)
+    return _row_estimate[0]
+
+
+def check_index_support(order_by: ProductOrder, range_columns: set[str]):
+    """Reject combinations no index can serve: a range filter on one column while sorting by another.
+
+    The (is_active, price, id) and (is_active, rating, id) indexes serve a range and an order on the
+    same column. Callers skip the check when supplier_id or category already narrow the scan.
+    """
+    sort_column = order_by.lstrip('-')
+    unsupported = range_columns - {sort_column}
+    if unsupported:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Filtering on {', '.join(sorted(unsupported))} while sorting by {sort_column} "
+                   f"requires supplier_id or category on a catalog this large"
+        )
+
+
+def product_listing_query(filters: list, order_by: ProductOrder, cursor: dict | None, limit: int):
+    column, descending, value_type = SORTS[order_by]
+    query = select(*ProductOut.columns(Product)).where(*filters)
+
+    if column is Product.id:
+        if cursor is not None:
+            query = query.where(Product.id > cursor_value(cursor, 'id'))
+        return query.order_by(Product.id).limit(limit + 1)
+
+    # NULLs have no place in a keyset, so rows without a value are left out of sorted listings
+    query = query.where(column.is_not(None))
+    if cursor is not None:
+        last_value = cursor_value(cursor, 'value', value_type)
+        last_id = cursor_value(cursor, 'id')
+        if descending:
+            query = query.where(or_(column < last_value, and_(column == last_value, Product.id < last_id)))
+        else:
+            query = query.where(or_(column > last_value, and_(column == last_value, Product.id > last_id)))
+
+    order = (column.desc(), Product.id.desc()) if descending else (column, Product.id)
+    return query.order_by(*order).limit(limit + 1)
+
+
+def listing_cursor(order_by: ProductOrder):
+    column, _, _ = SORTS[order_by]
+    if column is Product.id:
+        return lambda row: {'id': row.id}
+    return lambda row: {'value': getattr(row, column.key), 'id': row.id}
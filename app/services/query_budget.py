@@ -0,0 +1,106 @@
+"""Per-request SQL budgets and repeated-statement (N+1) detection for development and test runs."""
+from contextlib import contextmanager
+
+from loguru import logger
+
+from app.backend.query_stats import QueryStats
+from config import settings
+
+budget_logger = logger.bind(log_id='query-budget')
+
+_EXEMPT = object()
+
+
+class QueryReport:
+    """SQL issued by one request, checked against its route's budget."""
+
+    __slots__ = ('method', 'route', 'count', 'budget', 'repeated')
+
+    def __init__(self, method: str, route: str, count: int, budget: int | None, repeated: dict[str, int]):
+        self.method = method
+        self.route = route
+        self.count = count
+        self.budget = budget
+        self.repeated = repeated
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+    def describe(self) -> str:
+        lines = [f'{self.method} {self.route} issued {self.count} SQL statements'
+                 + (f' (budget {self.budget})' if self.budget is not None else '')]
+        for statement, times in sorted(self.repeated.items(), key=lambda item: -item[1]):
+            lines.append(f'  repeated {times}x: {" ".join(statement.split())[:200]}')
+        return '\n'.join(lines)
+
+
+class QueryBudgetExceeded(Exception):
+    def __init__(self, report: QueryReport):
+        super().__init__(report.describe())
+        self.report = report
+
+
+class QueryRecorder:
+    """Reports for every request served while recording; what the pytest fixture hands to tests."""
+
+    def __init__(self):
+        self.reports: list[QueryReport] = []
+
+    def _select(self, route: str | None) -> list[QueryReport]:
+        return [report for report in self.reports if route is None or report.route == route]
+
+    def assert_max_queries(self, limit: int, route: str | None = None):
+        offenders = [report for report in self._select(route) if report.count > limit]
+        if offenders:
+            raise AssertionError(f'More than {limit} SQL statements per request:\n'
+                                 + '\n'.join(report.describe() for report in offenders))
+
+    def assert_no_repeated_queries(self, route: str | None = None):
+        offenders = [report for report in self._select(route) if report.repeated]
+        if offenders:
+            raise AssertionError('Repeated SQL statements (N+1):\n'
+                                 + '\n'.join(report.describe() for report in offenders))
+
+
+_recorders: list[QueryRecorder] = []
+
+
+@contextmanager
+def record_queries():
+    recorder = QueryRecorder()
+    _recorders.append(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorders.remove(recorder)
+
+
+def tracking_enabled() -> bool:
+    return settings.QUERY_BUDGET_MODE != 'off' or bool(_recorders)
+
+
+def budget_for(method: str, route: str):
+    budgets = settings.QUERY_BUDGETS
+    for key in (f'{method} {route}', route):
+        if key in budgets:
+            return _EXEMPT if budgets[key] is None else budgets[key]
+    return settings.QUERY_BUDGET_DEFAULT
+
+
+def check_request(method: str, route: str, stats: QueryStats):
+    if stats.shapes is None:
+        return
+    budget = budget_for(method, route)
+    repeated = {statement: times for statement, times in stats.shapes.items()
+                if times >= settings.QUERY_REPEAT_THRESHOLD}
+    report = QueryReport(method, route, stats.count, None if budget is _EXEMPT else budget, repeated)
+    for recorder in _recorders:
+        recorder.reports.append(report)
+
+    if budget is _EXEMPT or settings.QUERY_BUDGET_MODE == 'off':
+        return
+    if report.over_budget or report.repeated:
+        if settings.QUERY_BUDGET_MODE == 'raise':
+            raise QueryBudgetExceeded(report)
+        budget_logger.warning(report.describe())
@@ -0,0 +1,136 @@
+import math
+import time
+from typing import Annotated
+
+from fastapi import Depends, HTTPException, Request, status
+
+from app.services.auth_helpers import get_current_user
+from config import settings
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_limit(spec: str) -> tuple[int, float]:
+    """'10/minute' -> (10, 60.0)"""
+    count, _, period = spec.partition('/')
+    if period not in PERIODS or not count.isdigit() or int(count) < 1:
+        raise ValueError(f'Invalid rate limit {spec!r}, expected "<count>/<second|minute|hour|day>"')
+    return int(count), float(PERIODS[period])
+
+
+class InMemoryRateLimiter:
+    """Token bucket per key: each check is a dict lookup and some arithmetic.
+
+    Buckets that have refilled completely hold no state worth keeping, so they are dropped in a sweep
+    that runs at most once per ``eviction_interval``.
+    """
+
+    def __init__(self, eviction_interval: float):
+        self.eviction_interval = eviction_interval
+        # key -> [tokens, updated_at, full_at]
+        self._buckets: dict[str, list[float]] = {}
+        self._next_eviction = time.monotonic() + eviction_interval
+
+    async def hit(self, key: str, count: int, period: float) -> float:
+        """Take one token; returns 0 when allowed, otherwise the seconds until a token is available."""
+        now = time.monotonic()
+        if now >= self._next_eviction:
+            self._evict(now)
+        rate = count / period
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = count
+        else:
+            tokens = min(count, bucket[0] + (now - bucket[1]) * rate)
+        if tokens < 1:
+            return (1 - tokens) / rate
+        tokens -= 1
+        self._buckets[key] = [tokens, now, now + (count - tokens) / rate]
+        return 0
+
+    def _evict(self, now: float):
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+        self._next_eviction = now + self.eviction_interval
+
+
+class RedisRateLimiter:
+    """Sliding-window counter shared by all workers, on any client exposing the redis.asyncio incr/decr/expire/get calls.
+
+    The previous fixed window's count is weighted by how much of it still overlaps the sliding window.
+    Denied hits are taken back, as the in-memory bucket does not charge for them either.
+    """
+
+    def __init__(self, client, prefix: str = 'ratelimit:'):
+        self.client = client
+        self.prefix = prefix
+
+    async def hit(self, key: str, count: int, period: float) -> float:
+        now = time.time()
+        window = int(now // period)
+        elapsed = now - window * period
+        current_key = f'{self.prefix}{key}:{window}'
+        current = await self.client.incr(current_key)
+        if current == 1:
+            await self.client.expire(current_key, math.ceil(period * 2))
+        previous = int(await self.client.get(f'{self.prefix}{key}:{window - 1}') or 0)
+
+        if previous * (period - elapsed) / period + current <= count:
+            return 0
+        await self.client.decr(current_key)
+        current -= 1
+        if current < count:
+            # Room is left in this window once enough of the previous one has slid out
+            return max(period * (1 - (count - current - 1) / previous) - elapsed, 0.001)
+        # This window is full: wait for the next, then for enough of this one to slide out of it
+        return period - elapsed + period * (1 - (count - 1) / current)
+
+
+def create_rate_limiter():
+    if settings.RATE_LIMIT_BACKEND == 'redis':
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError('RATE_LIMIT_BACKEND=redis requires the redis package')
+        return RedisRateLimiter(redis.from_url(settings.RATE_LIMIT_REDIS_URL))
+    return InMemoryRateLimiter(eviction_interval=settings.RATE_LIMIT_EVICTION_INTERVAL)
+
+
+rate_limiter = create_rate_limiter()
+limits = {name: parse_limit(spec) for name, spec in settings.RATE_LIMITS.items()}
+
+
+def client_ip(request: Request) -> str:
+    header = settings.RATE_LIMIT_FORWARDED_HEADER
+    if header:
+        forwarded = request.headers.get(header)
+        if forwarded:
+            # The right-most entry was added by our own proxy; anything left of it is client-supplied
+            return forwarded.rsplit(',', 1)[-1].strip()
+    return request.client.host if request.client else 'unknown'
+
+
+async def check_rate_limit(name: str, key: str):
+    limit = limits.get(name)
+    if limit is None or not settings.RATE_LIMIT_ENABLED:
+        return
+    retry_after = await rate_limiter.hit(f'{name}:{key}', *limit)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail='Too many requests, try again later',
+            headers={'Retry-After': str(math.ceil(retry_after))},
+        )
+
+
+def limit_by_ip(name: str):
+    """Route dependency applying ``settings.RATE_LIMITS[name]`` per client address."""
+    async def dependency(request: Request):
+        await check_rate_limit(name, f'ip:{client_ip(request)}')
+    return dependency
+
+
+def limit_by_user(name: str):
+    """Route dependency applying ``settings.RATE_LIMITS[name]`` per authenticated user id."""
+    async def dependency(user: Annotated[dict, Depends(get_current_user)]):
+        await check_rate_limit(name, f'user:{user.get("id")}')
+    return dependency
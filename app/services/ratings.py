@@ -0,0 +1,75 @@
+import asyncio
+
+from sqlalchemy import Float, cast, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import *
+
+
+async def recompute_product_ratings(db: AsyncSession, product_ids: list[int] | None = None) -> int:
+    """Set the rating aggregates from the active ratings, in one grouped pass over ix_ratings_active_product_id.
+
+    Only products whose aggregates are off are written, so ``updated_at`` moves only when the rating did.
+    """
+    aggregates = (select(Rating.product_id,
+                         func.count(Rating.id).label('rating_count'),
+                         func.sum(Rating.grade).label('rating_sum'))
+                  .where(Rating.is_active)
+                  .group_by(Rating.product_id))
+    if product_ids is not None:
+        aggregates = aggregates.where(Rating.product_id.in_(product_ids))
+    aggregates = aggregates.subquery()
+
+    rated_query = (update(Product)
+                   .where(Product.id == aggregates.c.product_id,
+                          or_(Product.rating_count != aggregates.c.rating_count,
+                              Product.rating_sum != aggregates.c.rating_sum))
+                   .values(rating_count=aggregates.c.rating_count,
+                           rating_sum=aggregates.c.rating_sum,
+                           rating=cast(aggregates.c.rating_sum, Float) / aggregates.c.rating_count))
+    # Products left without an active rating do not appear in the grouped rows
+    unrated_query = (update(Product)
+                     .where(Product.rating_count != 0,
+                            ~select(Rating.id).where(Rating.product_id == Product.id, Rating.is_active).exists())
+                     .values(rating_count=0, rating_sum=0, rating=0.0))
+    if product_ids is not None:
+        unrated_query = unrated_query.where(Product.id.in_(product_ids))
+
+    updated = 0
+    for query in (rated_query, unrated_query):
+        result = await db.execute(query.execution_options(synchronize_session=False))
+        updated += result.rowcount
+    return updated
+
+
+async def deactivate_reviews(db: AsyncSession, product_ids: list[int]) -> tuple[int, int]:
+    """Deactivate every review and rating of the given products; returns (ratings, reviews) rows affected.
+
+    The products' rating aggregates are left to a refresh_product_rating job.
+    """
+    ratings_query = (update(Rating)
+                     .where(Rating.id.in_(select(Review.rating_id).where(Review.product_id.in_(product_ids))),
+                            Rating.is_active)
+                     .values(is_active=False)
+                     .execution_options(synchronize_session=False))
+    ratings_result = await db.execute(ratings_query)
+
+    reviews_query = (update(Review)
+                     .where(Review.product_id.in_(product_ids), Review.is_active)
+                     .values(is_active=False)
+                     .execution_options(synchronize_session=False))
+    reviews_result = await db.execute(reviews_query)
+    return ratings_result.rowcount, reviews_result.rowcount
+
+
+async def main():
+    from app.backend.db import async_session_maker
+
+    async with async_session_maker() as session:
+        updated = await recompute_product_ratings(session)
+        await session.commit()
+    print(f'Recomputed rating aggregates for {updated} products')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import hmac
+import secrets
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException, status
+from loguru import logger
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import aliased
+
+from app.models import *
+from config import settings
+
+sweeper_logger = logger.bind(log_id='refresh-token-sweeper')
+
+
+def hash_refresh_token(token: str) -> str:
+    # Tokens are random, so a keyed hash is enough; no need for a slow password hash here
+    return hmac.new(settings.SECRET_KEY.encode(), token.encode(), hashlib.sha256).hexdigest()
+
+
+def invalid_refresh_token():
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail='Invalid refresh token',
+        headers={'WWW-Authenticate': 'Bearer'},
+    )
+
+
+async def issue_refresh_token(db: AsyncSession, user_id: int, family_id: str | None = None) -> str:
+    """Store a new refresh token for the user; the caller commits."""
+    token = secrets.token_urlsafe(32)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    await db.execute(insert(RefreshToken).values(
+        user_id=user_id,
+        token_hash=hash_refresh_token(token),
+        family_id=family_id or secrets.token_hex(16),
+        created_at=now,
+        expires_at=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token
+
+
+async def revoke_family(db: AsyncSession, family_id: str):
+    await db.execute(update(RefreshToken).where(RefreshToken.family_id == family_id).values(is_revoked=True))
+
+
+async def revoke_user_refresh_tokens(db: AsyncSession, user_id: int):
+    await db.execute(update(RefreshToken)
+                     .where(RefreshToken.user_id == user_id, RefreshToken.is_revoked == False)
+                     .values(is_revoked=True))
+
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> tuple[User, str]:
+    """Swap a refresh token for a new one in the same family and return its user.
+
+    Presenting a token that was already rotated means it leaked, so the whole family is revoked.
+    """
+    stored = (await db.execute(
+        select(RefreshToken, User)
+        .join(User, User.id == RefreshToken.user_id)
+        .where(RefreshToken.token_hash == hash_refresh_token(token))
+    )).first()
+    if stored is None:
+        raise invalid_refresh_token()
+    refresh_token, user = stored
+
+    if refresh_token.is_revoked:
+        await revoke_family(db, refresh_token.family_id)
+        await db.commit()
+        raise invalid_refresh_token()
+    if refresh_token.expires_at <= datetime.now(timezone.utc).replace(tzinfo=None) or not user.is_active:
+        raise invalid_refresh_token()
+
+    # Conditional update so two concurrent refreshes with the same token cannot both win
+    claimed = await db.execute(update(RefreshToken)
+                               .where(RefreshToken.id == refresh_token.id, RefreshToken.is_revoked == False)
+                               .values(is_revoked=True))
+    if claimed.rowcount == 0:
+        await revoke_family(db, refresh_token.family_id)
+        await db.commit()
+        raise invalid_refresh_token()
+
+    new_token = await issue_refresh_token(db, user.id, refresh_token.family_id)
+    await db.commit()
+    return user, new_token
+
+
+async def delete_dead_families(db: AsyncSession, limit: int) -> int:
+    """Delete up to ``limit`` token families in which no token can be used any more; returns how many.
+
+    Rotated tokens stay while their family is alive, so a replayed one is still recognised and revokes it.
+    """
+    live = aliased(RefreshToken)
+    live_token = select(live.id).where(live.family_id == RefreshToken.family_id,
+                                       live.is_revoked == False,
+                                       live.expires_at > datetime.now(timezone.utc).replace(tzinfo=None))
+    families = (await db.scalars(select(RefreshToken.family_id)
+                                 .where(~live_token.exists())
+                                 .distinct()
+                                 .limit(limit))).all()
+    if families:
+        await db.execute(delete(RefreshToken).where(RefreshToken.family_id.in_(families)))
+    await db.commit()
+    return len(families)
+
+
+async def run_refresh_token_sweeper(session_maker: async_sessionmaker, interval: float):
+    while True:
+        try:
+            async with session_maker() as session:
+                deleted = await delete_dead_families(session, settings.REFRESH_TOKEN_SWEEP_BATCH)
+            if deleted:
+                sweeper_logger.info(f'Deleted {deleted} expired or revoked refresh token families')
+            if deleted == settings.REFRESH_TOKEN_SWEEP_BATCH:
+                continue
+        except Exception as ex:
+            sweeper_logger.error(f'Refresh token sweep failed: {ex}')
+        await asyncio.sleep(interval)
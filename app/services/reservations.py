@@ -0,0 +1,163 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException, status
+from loguru import logger
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import *
+from app.services.cache import response_cache
+from config import settings
+
+
+# The app's log format expects a log_id, which requests get from the logging middleware
+sweeper_logger = logger.bind(log_id='reservation-sweeper')
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def take_stock(db: AsyncSession, product_id: int, quantity: int) -> int | None:
+    """Decrement stock only if enough is left, in one statement; returns the remaining stock or None."""
+    result = await db.execute(update(Product)
+                              .where(Product.id == product_id, Product.is_active, Product.stock >= quantity)
+                              .values(stock=Product.stock - quantity)
+                              .returning(Product.stock)
+                              .execution_options(synchronize_session=False))
+    return result.scalar_one_or_none()
+
+
+async def return_stock(db: AsyncSession, product_id: int, quantity: int) -> int | None:
+    result = await db.execute(update(Product)
+                              .where(Product.id == product_id)
+                              .values(stock=Product.stock + quantity)
+                              .returning(Product.stock)
+                              .execution_options(synchronize_session=False))
+    return result.scalar_one_or_none()
+
+
+async def reserve_stock(db: AsyncSession, user_id: int, items: list[tuple[int, int]]) -> tuple[list[dict], datetime]:
+    """Reserve every (product_id, quantity) item or none of them."""
+    quantities = defaultdict(int)
+    for product_id, quantity in items:
+        quantities[product_id] += quantity
+    expires_at = utcnow() + timedelta(seconds=settings.RESERVATION_TTL)
+
+    reservations = []
+    # Rows are locked in id order, so two carts sharing products cannot deadlock each other
+    for product_id in sorted(quantities):
+        quantity = quantities[product_id]
+        remaining = await take_stock(db, product_id, quantity)
+        if remaining is None:
+            await db.rollback()
+            product = await db.scalar(select(Product.id).where(Product.id == product_id, Product.is_active))
+            if product is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f'There is no product {product_id}'
+                )
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f'Not enough stock for product {product_id}'
+            )
+        reservation_id = await db.scalar(insert(StockReservation)
+                                         .values(product_id=product_id, user_id=user_id,
+                                                 quantity=quantity, expires_at=expires_at)
+                                         .returning(StockReservation.id))
+        reservations.append({'reservation_id': reservation_id, 'product_id': product_id,
+                             'quantity': quantity, 'stock': remaining})
+    await db.commit()
+    return reservations, expires_at
+
+
+async def reservation_conflict(db: AsyncSession, reservation_id: int, ownership: list) -> HTTPException:
+    reservation = (await db.execute(select(StockReservation.status, StockReservation.expires_at)
+                                    .where(StockReservation.id == reservation_id, *ownership))).first()
+    if reservation is None:
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='There is no reservation found'
+        )
+    if reservation.status == 'reserved':
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='Reservation has expired'
+        )
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f'Reservation is already {reservation.status}'
+    )
+
+
+async def release_reservation(db: AsyncSession, reservation_id: int, user_id: int, is_admin: bool) -> dict:
+    """Hand a held reservation's stock back."""
+    ownership = [] if is_admin else [StockReservation.user_id == user_id]
+    # Only one caller can move the row out of 'reserved', so stock is returned at most once
+    released = (await db.execute(update(StockReservation)
+                                 .where(StockReservation.id == reservation_id,
+                                        StockReservation.status == 'reserved', *ownership)
+                                 .values(status='released')
+                                 .returning(StockReservation.product_id, StockReservation.quantity)
+                                 .execution_options(synchronize_session=False))).first()
+    if released is None:
+        raise await reservation_conflict(db, reservation_id, ownership)
+    stock = await return_stock(db, released.product_id, released.quantity)
+    await db.commit()
+    return {'product_id': released.product_id, 'quantity': released.quantity, 'stock': stock}
+
+
+async def commit_reservation(db: AsyncSession, reservation_id: int, user_id: int, is_admin: bool):
+    ownership = [] if is_admin else [StockReservation.user_id == user_id]
+    committed = await db.execute(update(StockReservation)
+                                 .where(StockReservation.id == reservation_id,
+                                        StockReservation.status == 'reserved',
+                                        StockReservation.expires_at > utcnow(), *ownership)
+                                 .values(status='committed')
+                                 .execution_options(synchronize_session=False))
+    if committed.rowcount == 0:
+        raise await reservation_conflict(db, reservation_id, ownership)
+    await db.commit()
+
+
+async def release_expired(db: AsyncSession, limit: int) -> int:
+    """Release up to ``limit`` expired reservations; workers running this concurrently skip each other's rows."""
+    expired = (select(StockReservation.id)
+               .where(StockReservation.status == 'reserved', StockReservation.expires_at <= utcnow())
+               .order_by(StockReservation.expires_at)
+               .limit(limit)
+               .with_for_update(skip_locked=True))
+    released = (await db.execute(update(StockReservation)
+                                 .where(StockReservation.id.in_(expired), StockReservation.status == 'reserved')
+                                 .values(status='released')
+                                 .returning(StockReservation.product_id, StockReservation.quantity)
+                                 .execution_options(synchronize_session=False))).all()
+
+    quantities = defaultdict(int)
+    for product_id, quantity in released:
+        quantities[product_id] += quantity
+    back_in_stock = False
+    for product_id in sorted(quantities):
+        stock = await return_stock(db, product_id, quantities[product_id])
+        back_in_stock |= stock == quantities[product_id]
+    await db.commit()
+
+    if back_in_stock:
+        await response_cache.invalidate('products')
+    return len(released)
+
+
+async def run_reservation_sweeper(session_maker: async_sessionmaker, interval: float):
+    while True:
+        try:
+            async with session_maker() as session:
+                released = await release_expired(session, settings.RESERVATION_SWEEP_BATCH)
+            if released:
+                sweeper_logger.info(f'Released {released} expired stock reservations')
+            if released == settings.RESERVATION_SWEEP_BATCH:
+                continue
+        except Exception as ex:
+            sweeper_logger.error(f'Stock reservation sweep failed: {ex}')
+        await asyncio.sleep(interval)
@@ -0,0 +1,83 @@
+from sqlalchemy import Float, and_, case, cast, func, literal, literal_column, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import *
+from app.schemas import CategoryFacet, PriceRangeFacet, ProductOut, SearchFacets
+from app.services.pagination import cursor_value
+from config import settings
+
+
+# Generated tsvector column; it is created by the migration and not mapped on Product
+search_vector = literal_column('products.search_vector')
+
+
+def search_mode(db: AsyncSession) -> str:
+    if settings.SEARCH_MODE != 'auto':
+        return settings.SEARCH_MODE
+    return 'fulltext' if db.bind.dialect.name == 'postgresql' else 'like'
+
+
+def ts_query(q: str):
+    # Rendered inline so the planner sees a constant regconfig, same as the one the column was built with
+    language = literal_column(f"'{settings.SEARCH_LANGUAGE.replace(chr(39), '')}'::regconfig")
+    return func.websearch_to_tsquery(language, q)
+
+
+def match_condition(mode: str, q: str):
+    if mode == 'fulltext':
+        return search_vector.op('@@')(ts_query(q))
+    pattern = '%' + q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    return or_(Product.name.ilike(pattern, escape='\\'), Product.description.ilike(pattern, escape='\\'))
+
+
+def rank_expression(mode: str, q: str):
+    if mode == 'fulltext':
+        return cast(func.ts_rank_cd(search_vector, ts_query(q)), Float)
+    return literal(0.0, Float)
+
+
+def price_bucket():
+    bounds = settings.SEARCH_PRICE_BUCKETS
+    return case(*((Product.price < bound, index) for index, bound in enumerate(bounds)), else_=len(bounds))
+
+
+def search_query(mode: str, q: str, filters: list, cursor: dict | None, limit: int):
+    rank = rank_expression(mode, q).label('rank')
+    query = select(*ProductOut.columns(Product), rank).where(match_condition(mode, q), *filters)
+
+    if cursor is not None:
+        last_id = cursor_value(cursor, 'id')
+        if mode == 'fulltext':
+            last_rank = cursor_value(cursor, 'rank', float)
+            query = query.where(or_(rank < last_rank, and_(rank == last_rank, Product.id > last_id)))
+        else:
+            query = query.where(Product.id > last_id)
+
+    order = (rank.desc(), Product.id) if mode == 'fulltext' else (Product.id,)
+    return query.order_by(*order).limit(limit + 1)
+
+
+async def search_facets(db: AsyncSession, mode: str, q: str, base_filters: list,
+                        category_filters: list, price_filters: list) -> SearchFacets:
+    # Each facet ignores its own filter so clients can see the counts of the alternatives
+    match = match_condition(mode, q)
+
+    categories_query = (select(Product.category_id, func.count(Product.id))
+                        .where(match, *base_filters, *price_filters)
+                        .group_by(Product.category_id)
+                        .order_by(func.count(Product.id).desc()))
+    categories = await db.execute(categories_query)
+
+    bucket = price_bucket().label('bucket')
+    prices_query = (select(bucket, func.count(Product.id))
+                    .where(match, *base_filters, *category_filters)
+                    .group_by(bucket)
+                    .order_by(bucket))
+    prices = await db.execute(prices_query)
+
+    bounds = [None, *settings.SEARCH_PRICE_BUCKETS, None]
+    return SearchFacets(
+        categories=[CategoryFacet(category_id=category_id, count=count) for category_id, count in categories],
+        price_ranges=[PriceRangeFacet(min=bounds[index], max=bounds[index + 1], count=count)
+                      for index, count in prices],
+    )
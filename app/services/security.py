@@ -1,6 +1,40 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 
+from config import settings
+
 
-bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto', bcrypt__rounds=settings.BCRYPT_ROUNDS)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
+
+# bcrypt releases the GIL, so a few threads keep hashing off the event loop without starving it
+password_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS,
+                                       thread_name_prefix='password-hash')
+_pending_jobs = 0
+
+
+async def _run_password_job(func, *args):
+    global _pending_jobs
+    if _pending_jobs >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Too many password checks in progress, try again later',
+            headers={'Retry-After': str(settings.PASSWORD_HASH_RETRY_AFTER)},
+        )
+    _pending_jobs += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(password_executor, func, *args)
+    finally:
+        _pending_jobs -= 1
+
+
+async def hash_password(password: str) -> str:
+    return await _run_password_job(bcrypt_context.hash, password)
+
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    return await _run_password_job(bcrypt_context.verify, password, hashed_password)
@@ -0,0 +1,280 @@
+"""Work that can happen after the response: handlers registered with ``@task`` and the queues that run them.
+
+Jobs submitted with a key are coalesced: while one is still waiting, submitting the same name and key
+again does not add a second run.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from loguru import logger
+from sqlalchemy import and_, delete, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.backend.db import async_session_maker
+from app.models import *
+from config import settings
+
+task_logger = logger.bind(log_id='task-queue')
+
+handlers: dict[str, Callable[..., Awaitable]] = {}
+
+
+def task(name: str):
+    """Register ``handler(db, **args)`` under ``name``; the arguments must be JSON-serializable."""
+    def register(handler):
+        handlers[name] = handler
+        return handler
+    return register
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def retry_delay(attempts: int) -> float:
+    return settings.TASK_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+async def run_handler(session_maker: async_sessionmaker, name: str, args: dict):
+    async with session_maker() as session:
+        await handlers[name](session, **args)
+
+
+class Job:
+    __slots__ = ('name', 'key', 'args', 'attempts')
+
+    def __init__(self, name: str, key: str | None, args: dict):
+        self.name = name
+        self.key = key
+        self.args = args
+        self.attempts = 0
+
+
+class InProcessTaskQueue:
+    """Bounded asyncio queue drained by a pool of worker tasks on the API's own event loop.
+
+    When the queue is full, or not running (scripts, shutdown), ``submit`` runs the job in the caller
+    instead, so a backlog slows writers down rather than losing work.
+    """
+
+    def __init__(self, session_maker: async_sessionmaker, maxsize: int, workers: int, max_attempts: int):
+        self.session_maker = session_maker
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.running = False
+        self._queue: asyncio.Queue[Job] = asyncio.Queue(maxsize=maxsize)
+        self._waiting: dict[tuple[str, str], Job] = {}
+        self._retries: dict[Job, asyncio.TimerHandle] = {}
+        self._workers: list[asyncio.Task] = []
+
+    async def start(self):
+        self.running = True
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def submit(self, name: str, key: str | None = None, **args):
+        if key is not None:
+            waiting = self._waiting.get((name, key))
+            if waiting is not None:
+                waiting.args = args
+                return
+        if not self.running or self._queue.full():
+            try:
+                await run_handler(self.session_maker, name, args)
+            except Exception as ex:
+                task_logger.error(f'Task {name} ({key}) failed inline: {ex}')
+            return
+        self._enqueue(Job(name, key, args))
+
+    async def drain(self, timeout: float):
+        """Stop taking jobs, give queued ones (and pending retries) until ``timeout`` to finish."""
+        self.running = False
+        for job, handle in list(self._retries.items()):
+            handle.cancel()
+            self._requeue(job)
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            task_logger.warning(f'Task queue drain timed out with {self._queue.qsize()} jobs left')
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def _enqueue(self, job: Job):
+        if job.key is not None:
+            self._waiting[(job.name, job.key)] = job
+        self._queue.put_nowait(job)
+
+    def _requeue(self, job: Job):
+        self._retries.pop(job, None)
+        if job.key is not None and (job.name, job.key) in self._waiting:
+            # A newer submission of the same work is already waiting and covers this one
+            return
+        if self._queue.full():
+            task_logger.error(f'Task {job.name} ({job.key}) dropped: queue full on retry')
+            return
+        self._enqueue(job)
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.key is not None and self._waiting.get((job.name, job.key)) is job:
+                    # From here on a new submission must run again: it may carry changes this run misses
+                    del self._waiting[(job.name, job.key)]
+                await self._attempt(job)
+            finally:
+                self._queue.task_done()
+
+    async def _attempt(self, job: Job):
+        job.attempts += 1
+        try:
+            await run_handler(self.session_maker, job.name, job.args)
+        except Exception as ex:
+            if job.attempts >= self.max_attempts:
+                task_logger.error(f'Task {job.name} ({job.key}) failed after {job.attempts} attempts: {ex}')
+            elif not self.running:
+                self._requeue(job)
+            else:
+                delay = retry_delay(job.attempts)
+                task_logger.warning(f'Task {job.name} ({job.key}) failed, retrying in {delay}s: {ex}')
+                self._retries[job] = asyncio.get_running_loop().call_later(delay, self._requeue, job)
+
+
+class DatabaseTaskQueue:
+    """Jobs stored in background_jobs and run by separate ``python -m app.services.tasks`` workers."""
+
+    def __init__(self, session_maker: async_sessionmaker):
+        self.session_maker = session_maker
+
+    async def start(self):
+        pass
+
+    async def submit(self, name: str, key: str | None = None, **args):
+        values = {'name': name, 'key': key, 'args': args, 'status': 'pending', 'attempts': 0, 'run_after': utcnow()}
+        async with self.session_maker() as session:
+            dialect = session.bind.dialect.name
+            if dialect in ('postgresql', 'sqlite'):
+                insert_query = (postgresql.insert if dialect == 'postgresql' else sqlite.insert)(BackgroundJob)
+                # Already pending under this key: that run will see our changes too
+                await session.execute(insert_query.values(**values).on_conflict_do_nothing(
+                    index_elements=['name', 'key'], index_where=BackgroundJob.status == 'pending'))
+            else:
+                try:
+                    await session.execute(insert(BackgroundJob).values(**values))
+                except IntegrityError:
+                    await session.rollback()
+                    return
+            await session.commit()
+
+    async def drain(self, timeout: float):
+        pass
+
+
+def create_task_queue():
+    if settings.TASK_QUEUE_BACKEND == 'database':
+        if settings.CACHE_BACKEND != 'redis':
+            # Jobs invalidate cached responses, which must be the ones the API workers serve
+            raise RuntimeError('TASK_QUEUE_BACKEND=database requires CACHE_BACKEND=redis')
+        return DatabaseTaskQueue(async_session_maker)
+    return InProcessTaskQueue(async_session_maker, maxsize=settings.TASK_QUEUE_SIZE, workers=settings.TASK_QUEUE_WORKERS,
+                              max_attempts=settings.TASK_MAX_ATTEMPTS)
+
+
+task_queue = create_task_queue()
+
+
+async def requeue_stale_jobs(db: AsyncSession) -> int:
+    stale = and_(BackgroundJob.status == 'running',
+                 BackgroundJob.started_at < utcnow() - timedelta(seconds=settings.TASK_JOB_TIMEOUT))
+    superseded = BackgroundJob.__table__.alias('superseding')
+    # A stale job whose key is pending again is covered by that job; the rest go back to pending
+    await db.execute(delete(BackgroundJob).where(
+        stale, select(superseded.c.id).where(superseded.c.status == 'pending',
+                                             superseded.c.name == BackgroundJob.name,
+                                             superseded.c.key == BackgroundJob.key).exists()))
+    result = await db.execute(update(BackgroundJob).where(stale).values(status='pending', started_at=None))
+    await db.commit()
+    return result.rowcount
+
+
+async def claim_jobs(db: AsyncSession, limit: int) -> list[tuple[int, str, str | None, dict, int]]:
+    """Mark up to ``limit`` due jobs as running; SKIP LOCKED lets any number of workers claim at once."""
+    query = (select(BackgroundJob.id)
+             .where(BackgroundJob.status == 'pending', BackgroundJob.run_after <= utcnow())
+             .order_by(BackgroundJob.run_after, BackgroundJob.id)
+             .limit(limit)
+             .with_for_update(skip_locked=True))
+    ids = (await db.scalars(query)).all()
+    if not ids:
+        await db.rollback()
+        return []
+    result = await db.execute(update(BackgroundJob)
+                              .where(BackgroundJob.id.in_(ids))
+                              .values(status='running', started_at=utcnow(), attempts=BackgroundJob.attempts + 1)
+                              .returning(BackgroundJob.id, BackgroundJob.name, BackgroundJob.key,
+                                         BackgroundJob.args, BackgroundJob.attempts)
+                              .execution_options(synchronize_session=False))
+    claimed = [tuple(row) for row in result]
+    await db.commit()
+    return sorted(claimed)
+
+
+async def finish_job(db: AsyncSession, job_id: int, name: str, key: str | None, attempts: int, error: str | None):
+    if error is None:
+        await db.execute(delete(BackgroundJob).where(BackgroundJob.id == job_id))
+    elif attempts >= settings.TASK_MAX_ATTEMPTS:
+        await db.execute(update(BackgroundJob).where(BackgroundJob.id == job_id)
+                         .values(status='failed', last_error=error))
+    else:
+        try:
+            await db.execute(update(BackgroundJob).where(BackgroundJob.id == job_id)
+                             .values(status='pending', last_error=error, started_at=None,
+                                     run_after=utcnow() + timedelta(seconds=retry_delay(attempts))))
+        except IntegrityError:
+            # The same work was submitted again while this run failed; the new job covers it
+            await db.rollback()
+            await db.execute(delete(BackgroundJob).where(BackgroundJob.id == job_id))
+    await db.commit()
+
+
+async def run_due_jobs(session_maker: async_sessionmaker, batch: int) -> int:
+    """One worker cycle: requeue jobs of lost workers, then claim and run up to ``batch`` due jobs."""
+    async with session_maker() as session:
+        requeued = await requeue_stale_jobs(session)
+        if requeued:
+            task_logger.warning(f'Requeued {requeued} jobs from lost workers')
+        jobs = await claim_jobs(session, batch)
+        for job_id, name, key, args, attempts in jobs:
+            error = None
+            try:
+                await run_handler(session_maker, name, args)
+            except Exception as ex:
+                error = f'{type(ex).__name__}: {ex}'
+                task_logger.warning(f'Task {name} ({key}) attempt {attempts} failed: {error}')
+            await finish_job(session, job_id, name, key, attempts, error)
+    return len(jobs)
+
+
+async def run_database_worker(session_maker: async_sessionmaker, poll_interval: float, batch: int):
+    while True:
+        try:
+            if await run_due_jobs(session_maker, batch) == batch:
+                continue
+        except Exception as ex:
+            task_logger.error(f'Task worker loop failed: {ex}')
+        await asyncio.sleep(poll_interval)
+
+
+async def main():
+    import app.services.jobs  # registers the handlers
+
+    task_logger.info('Task worker started')
+    await run_database_worker(async_session_maker, settings.TASK_POLL_INTERVAL, settings.TASK_CLAIM_BATCH)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+import time
+from collections import OrderedDict
+
+from config import settings
+
+
+class TokenCache:
+    """Bounded LRU of verified token -> claims; an entry lives until the token's own ``exp``."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    def get(self, token: str) -> dict | None:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        expires_at, claims = entry
+        if expires_at <= time.time():
+            del self._entries[token]
+            return None
+        self._entries.move_to_end(token)
+        return claims
+
+    def set(self, token: str, claims: dict, expires_at: float):
+        self._entries[token] = (expires_at, claims)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class InMemoryRevocationList:
+    """Users whose outstanding access tokens must be rejected.
+
+    Entries only need to outlive the longest access token issued before the revocation.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._revoked: dict[int, float] = {}
+
+    async def is_revoked(self, user_id: int) -> bool:
+        expires_at = self._revoked.get(user_id)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            del self._revoked[user_id]
+            return False
+        return True
+
+    async def revoke_user(self, user_id: int):
+        now = time.time()
+        self._revoked = {revoked_id: expires_at for revoked_id, expires_at in self._revoked.items()
+                         if expires_at > now}
+        self._revoked[user_id] = now + self.ttl
+
+
+class RedisRevocationList:
+    """Revocations shared by all workers, on any client exposing the redis.asyncio set/exists calls."""
+
+    def __init__(self, client, ttl: float, prefix: str = 'revoked:'):
+        self.client = client
+        self.ttl = int(ttl)
+        self.prefix = prefix
+
+    async def is_revoked(self, user_id: int) -> bool:
+        return bool(await self.client.exists(f'{self.prefix}{user_id}'))
+
+    async def revoke_user(self, user_id: int):
+        await self.client.set(f'{self.prefix}{user_id}', 1, ex=self.ttl)
+
+
+def create_revocation_list():
+    ttl = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    if settings.REVOCATION_BACKEND == 'redis':
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError('REVOCATION_BACKEND=redis requires the redis package')
+        return RedisRevocationList(redis.from_url(settings.REVOCATION_REDIS_URL), ttl=ttl)
+    return InMemoryRevocationList(ttl=ttl)
+
+
+token_cache = TokenCache(max_size=settings.TOKEN_CACHE_SIZE)
+revocation_list = create_revocation_list()
@@ -0,0 +1,52 @@
+"""Per-request cost of get_current_user: full JWT decode on every call vs the token cache fast path.
+
+    python -m benchmarks.bench_auth --tokens 100 --calls 50000
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import timedelta
+
+from benchmarks.environment import use_defaults
+
+use_defaults()
+
+from app.services.auth_helpers import create_access_token, get_current_user
+from app.services.token_cache import token_cache
+
+
+async def measure(tokens: list[str], calls: int, cached: bool) -> dict:
+    token_cache.clear()
+    started = time.perf_counter()
+    for i in range(calls):
+        if not cached:
+            token_cache.clear()
+        await get_current_user(tokens[i % len(tokens)])
+    elapsed = time.perf_counter() - started
+    return {
+        'seconds': round(elapsed, 4),
+        'microseconds_per_call': round(elapsed / calls * 1_000_000, 2),
+    }
+
+
+async def main(token_count: int, calls: int):
+    tokens = [await create_access_token(f'user{i}', i, False, False, True, timedelta(minutes=20))
+              for i in range(token_count)]
+    results = {
+        'tokens': token_count,
+        'calls': calls,
+        'before_decode_every_call': await measure(tokens, calls, cached=False),
+        'after_token_cache': await measure(tokens, calls, cached=True),
+    }
+    results['speedup'] = round(results['before_decode_every_call']['seconds']
+                               / results['after_token_cache']['seconds'], 2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tokens', type=int, default=100)
+    parser.add_argument('--calls', type=int, default=50_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.tokens, args.calls))
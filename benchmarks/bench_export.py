@@ -0,0 +1,111 @@
+"""Peak RSS of GET /products/export over a large synthetic catalog; exits non-zero if memory grows with it.
+
+    python -m benchmarks.bench_export --rows 200000 --max-growth-mb 64
+"""
+import argparse
+import asyncio
+import json
+import resource
+import sqlite3
+import sys
+import time
+
+from benchmarks.environment import enter_workdir, use_defaults
+
+use_defaults()
+workdir = enter_workdir()
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.backend import db_depends
+from app.backend.db import Base
+from app.main import app
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def seed(path: str, rows: int):
+    # Plain sqlite3 with a generator keeps seeding itself from raising the peak being measured
+    sync_engine = create_engine(f'sqlite:///{path}')
+    Base.metadata.create_all(sync_engine)
+    sync_engine.dispose()
+    with sqlite3.connect(path) as connection:
+        connection.execute("INSERT INTO categories (id, name, slug, is_active) VALUES (1, 'Bench', 'bench', 1)")
+        connection.executemany(
+            'INSERT INTO products (name, slug, description, price, image_url, stock, rating, rating_count, '
+            'rating_sum, is_active, category_id) VALUES (?, ?, ?, ?, ?, ?, ?, 0, 0, 1, 1)',
+            ((f'Product {i}', f'product-{i}', f'Description of product {i}', i % 10_000,
+              f'https://cdn.example.com/{i}.jpg', i % 50, (i % 50) / 10) for i in range(rows)))
+
+
+async def export(path: str, query_string: bytes, accept_encoding: bytes) -> dict:
+    """Drive the ASGI app directly: test clients buffer the whole body, which would defeat the measurement."""
+    engine = create_async_engine(f'sqlite+aiosqlite:///{path}')
+    session_maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    app.dependency_overrides[db_depends.get_read_session_maker] = lambda: session_maker
+
+    received = {'bytes': 0, 'chunks': 0, 'status': None}
+    scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+             'scheme': 'http', 'path': '/products/export', 'raw_path': b'/products/export',
+             'query_string': query_string, 'root_path': '', 'headers': [(b'accept-encoding', accept_encoding)],
+             'client': ('127.0.0.1', 0), 'server': ('bench', 80)}
+
+    requested = asyncio.Event()
+
+    async def receive():
+        if not requested.is_set():
+            requested.set()
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # The client stays connected; the response cancels this wait once the body is sent
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            received['status'] = message['status']
+        elif message['type'] == 'http.response.body':
+            received['bytes'] += len(message.get('body', b''))
+            received['chunks'] += 1
+
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    received['seconds'] = round(time.perf_counter() - started, 3)
+    await engine.dispose()
+    return received
+
+
+async def main(rows: int, max_growth_mb: float) -> bool:
+    # A small warm-up export pays the one-off import and compile costs before the baseline is taken
+    warmup_path = f'{workdir}/warmup.db'
+    seed(warmup_path, 1000)
+    await export(warmup_path, b'format=ndjson', b'identity')
+
+    path = f'{workdir}/bench.db'
+    seed(path, rows)
+    baseline = peak_rss_mb()
+
+    results = {'rows': rows, 'baseline_peak_rss_mb': round(baseline, 1)}
+    for label, query_string, accept_encoding in (('ndjson', b'format=ndjson', b'identity'),
+                                                 ('csv_gzip', b'format=csv', b'gzip')):
+        result = await export(path, query_string, accept_encoding)
+        result['rows_per_second'] = round(rows / result['seconds'])
+        result['peak_rss_growth_mb'] = round(peak_rss_mb() - baseline, 1)
+        results[label] = result
+
+    growth = peak_rss_mb() - baseline
+    results['max_growth_mb'] = max_growth_mb
+    results['passed'] = growth <= max_growth_mb
+    print(json.dumps(results, indent=2))
+    return results['passed']
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--max-growth-mb', type=float, default=64)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main(args.rows, args.max_growth_mb)) else 1)
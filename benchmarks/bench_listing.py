@@ -0,0 +1,93 @@
+"""Serialization cost of a full product listing: ORM entities + jsonable_encoder vs column rows + orjson.
+
+    python -m benchmarks.bench_listing --rows 50000 --repeat 5
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+
+from benchmarks.environment import use_defaults
+
+use_defaults()
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.backend.db import Base
+from app.models import *
+from app.schemas import ProductOut, ProductPage
+
+
+async def seed(session_maker, rows: int):
+    async with session_maker() as session:
+        await session.execute(insert(Category).values(id=1, name='Bench', slug='bench'))
+        await session.execute(insert(Product), [{
+            'name': f'Product {i}',
+            'slug': f'product-{i}',
+            'description': f'Description of product {i}',
+            'price': i % 10_000,
+            'image_url': f'https://cdn.example.com/{i}.jpg',
+            'stock': i % 50 + 1,
+            'rating': (i % 50) / 10,
+            'category_id': 1,
+        } for i in range(rows)])
+        await session.commit()
+
+
+async def orm_listing(session: AsyncSession) -> bytes:
+    products = (await session.scalars(select(Product))).all()
+    return json.dumps(jsonable_encoder({'items': products, 'next_cursor': None}),
+                      ensure_ascii=False, separators=(',', ':')).encode()
+
+
+async def row_listing(session: AsyncSession) -> bytes:
+    rows = (await session.execute(select(*ProductOut.columns(Product)))).all()
+    page = ProductPage.model_construct(items=[ProductOut.from_row(row) for row in rows], next_cursor=None)
+    return orjson.dumps(page.model_dump())
+
+
+async def measure(session_maker, listing, rows: int, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        async with session_maker() as session:
+            started = time.perf_counter()
+            body = await listing(session)
+            timings.append(time.perf_counter() - started)
+    best = min(timings)
+    return {
+        'best_seconds': round(best, 4),
+        'mean_seconds': round(sum(timings) / len(timings), 4),
+        'rows_per_second': round(rows / best),
+        'body_bytes': len(body),
+    }
+
+
+async def main(rows: int, repeat: int):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(f'sqlite+aiosqlite:///{directory}/bench.db')
+        session_maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        await seed(session_maker, rows)
+
+        results = {
+            'rows': rows,
+            'before_orm_jsonable_encoder': await measure(session_maker, orm_listing, rows, repeat),
+            'after_rows_orjson': await measure(session_maker, row_listing, rows, repeat),
+        }
+        results['speedup'] = round(results['before_orm_jsonable_encoder']['best_seconds']
+                                   / results['after_rows_orjson']['best_seconds'], 2)
+        await engine.dispose()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,106 @@
+"""Catalog GET latency while logins are hammered: bcrypt on the event loop vs the password executor.
+
+    python -m benchmarks.bench_login_load --logins 16 --seconds 5
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.environment import enter_workdir, use_defaults
+
+use_defaults()
+workdir = enter_workdir()
+
+import httpx
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.backend import db_depends
+from app.backend.db import Base
+from app.main import app
+from app.models import *
+from app.services import auth_helpers, security
+from app.services.cache import response_cache
+
+
+async def inline_verify_password(password: str, hashed_password: str) -> bool:
+    return security.bcrypt_context.verify(password, hashed_password)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def catalog_probe(client: httpx.AsyncClient, deadline: float) -> list[float]:
+    latencies = []
+    while time.perf_counter() < deadline:
+        await response_cache.invalidate('products')
+        started = time.perf_counter()
+        await client.get('/products/', params={'limit': 20})
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.005)
+    return latencies
+
+
+async def login_loop(client: httpx.AsyncClient, deadline: float, statuses: dict):
+    while time.perf_counter() < deadline:
+        response = await client.post('/auth/token', data={'username': 'bench', 'password': 'bench-password'})
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if response.status_code == 503:
+            await asyncio.sleep(0.05)
+
+
+async def run(client: httpx.AsyncClient, logins: int, seconds: float) -> dict:
+    deadline = time.perf_counter() + seconds
+    statuses = {}
+    probe = asyncio.create_task(catalog_probe(client, deadline))
+    await asyncio.gather(*(login_loop(client, deadline, statuses) for _ in range(logins)))
+    latencies = await probe
+    return {
+        'catalog_requests': len(latencies),
+        'catalog_p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'catalog_p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'login_statuses': statuses,
+    }
+
+
+async def main(logins: int, seconds: float):
+    engine = create_async_engine(f'sqlite+aiosqlite:///{workdir}/bench.db')
+    session_maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with session_maker() as session:
+        await session.execute(insert(User).values(username='bench', is_customer=True, is_active=True,
+                                                  hashed_password=await security.hash_password('bench-password')))
+        await session.execute(insert(Category).values(id=1, name='Bench', slug='bench'))
+        await session.execute(insert(Product), [{'name': f'Product {i}', 'slug': f'product-{i}', 'price': i,
+                                                 'stock': 1, 'category_id': 1} for i in range(500)])
+        await session.commit()
+
+    async def get_bench_db():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[db_depends.get_db] = get_bench_db
+    app.dependency_overrides[db_depends.get_read_db] = get_bench_db
+
+    results = {'logins_in_flight': logins, 'bcrypt_rounds': security.bcrypt_context.to_dict()['bcrypt__rounds']}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://bench') as client:
+        results['idle'] = await run(client, 0, seconds)
+        results['after_password_executor'] = await run(client, logins, seconds)
+        auth_helpers.verify_password = inline_verify_password
+        results['before_bcrypt_on_event_loop'] = await run(client, logins, seconds)
+
+    await engine.dispose()
+    security.password_executor.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--logins', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.seconds))
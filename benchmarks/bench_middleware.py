@@ -0,0 +1,105 @@
+"""Per-request overhead of request logging: none vs the old loguru log_middleware vs LogMiddleware.
+
+    python -m benchmarks.bench_middleware --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import time
+from uuid import uuid4
+
+from benchmarks.environment import enter_workdir, use_defaults
+
+use_defaults(ACCESS_LOG_PATH='bench-access.log')
+# Every log file the app opens lands in the scratch directory
+workdir = enter_workdir()
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, ORJSONResponse
+from loguru import logger
+
+from app.main import LogMiddleware
+from app.services.access_log import access_log
+
+
+async def loguru_middleware(request: Request, call_next):
+    # log_middleware as it was before access logging
+    log_id = str(uuid4())
+    with logger.contextualize(log_id=log_id):
+        try:
+            response = await call_next(request)
+            if response.status_code in [401, 402, 403, 404]:
+                logger.warning(f"Request to {request.url.path} failed")
+            else:
+                logger.info('Successfully accessed ' + request.url.path)
+        except Exception as ex:
+            logger.error(f"Request to {request.url.path} failed: {ex}")
+            response = JSONResponse(content={"success": False}, status_code=500)
+        return response
+
+
+def build_app(middleware=None, asgi_middleware=None) -> FastAPI:
+    bench_app = FastAPI(default_response_class=ORJSONResponse)
+    if middleware is not None:
+        bench_app.middleware('http')(middleware)
+    if asgi_middleware is not None:
+        bench_app.add_middleware(asgi_middleware)
+
+    @bench_app.get('/items/{item_id}')
+    async def item(item_id: int):
+        return {'id': item_id}
+
+    return bench_app
+
+
+async def call(bench_app: FastAPI, path: str):
+    scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+             'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+             'root_path': '', 'headers': [], 'client': ('127.0.0.1', 0), 'server': ('bench', 80)}
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        pass
+
+    await bench_app(scope, receive, send)
+
+
+async def measure(bench_app: FastAPI, requests: int) -> float:
+    for i in range(200):
+        await call(bench_app, f'/items/{i}')
+    started = time.perf_counter()
+    for i in range(requests):
+        await call(bench_app, f'/items/{i}')
+    return (time.perf_counter() - started) / requests * 1_000_000
+
+
+async def main(requests: int):
+    logger.remove()
+    logger.add(f'{workdir}/info.log', format="Log: [{extra[log_id]}:{time} - {level} - {message} ",
+               level="INFO", enqueue=True)
+
+    baseline = await measure(build_app(), requests)
+    results = {'requests': requests, 'no_middleware_us': round(baseline, 2)}
+    for label, bench_app in (('before_loguru', build_app(middleware=loguru_middleware)),
+                             ('after_access_log', build_app(asgi_middleware=LogMiddleware))):
+        per_request = await measure(bench_app, requests)
+        results[label] = {'us_per_request': round(per_request, 2),
+                          'overhead_us': round(per_request - baseline, 2)}
+    results['access_log_dropped'] = access_log.dropped
+    access_log.close()
+    logger.complete()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=20_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
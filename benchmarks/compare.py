@@ -0,0 +1,55 @@
+"""Compare two benchmarks.run result files; exits non-zero when a workload regressed past the threshold.
+
+    python -m benchmarks.compare before.json after.json --threshold 0.1
+"""
+import argparse
+import json
+import sys
+
+# metric -> True when bigger is better
+METRICS = {'throughput_rps': True, 'p50_ms': False, 'p99_ms': False}
+
+
+def change(before: float, after: float) -> float | None:
+    return (after - before) / before if before else None
+
+
+def compare(before: dict, after: dict, threshold: float) -> dict:
+    workloads = {}
+    regressions = []
+    for name, old in before['workloads'].items():
+        new = after['workloads'].get(name)
+        if new is None:
+            continue
+        row = {}
+        for metric, higher_is_better in METRICS.items():
+            delta = change(old[metric], new[metric])
+            row[metric] = {'before': old[metric], 'after': new[metric],
+                           'change': None if delta is None else round(delta, 4)}
+            if delta is not None and (-delta if higher_is_better else delta) > threshold:
+                regressions.append(f'{name}.{metric}')
+        row['errors'] = {'before': old['errors'], 'after': new['errors']}
+        if new['errors'] > old['errors']:
+            regressions.append(f'{name}.errors')
+        workloads[name] = row
+    return {
+        'before': {key: before.get(key) for key in ('commit', 'target', 'database')},
+        'after': {key: after.get(key) for key in ('commit', 'target', 'database')},
+        # Numbers only mean something between runs on the same data and the same target
+        'comparable': before.get('data') == after.get('data') and before.get('target') == after.get('target'),
+        'threshold': threshold,
+        'workloads': workloads,
+        'regressions': regressions,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=0.1, help='tolerated relative slowdown')
+    args = parser.parse_args()
+    with open(args.before) as before, open(args.after) as after:
+        report = compare(json.load(before), json.load(after), args.threshold)
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report['regressions'] else 0)
@@ -0,0 +1,142 @@
+"""Seeded synthetic catalog: users, a deep category tree, products, ratings and reviews.
+
+    python -m benchmarks.datagen --url sqlite+aiosqlite:///bench.db --scale small --seed 1
+
+The same scale and seed always produce the same rows, so results from different commits are
+comparable. Slugs and usernames are derived from row numbers (category-3, product-17, user-5),
+which is all the workloads need to address them. --url must point at an empty scratch database.
+"""
+import argparse
+import asyncio
+import json
+import random
+from datetime import datetime, timedelta
+
+from benchmarks.environment import use_defaults
+
+use_defaults()
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.backend.db import Base
+from app.models import *
+from app.services.security import bcrypt_context
+
+PASSWORD = 'bench-password'
+BATCH_SIZE = 5000
+
+# roots * fanout ** depth categories at the bottom level; products hang off any level
+SCALES = {
+    'small': {'users': 200, 'roots': 2, 'fanout': 2, 'depth': 6, 'products': 2_000, 'reviews': 10_000},
+    'medium': {'users': 2_000, 'roots': 4, 'fanout': 3, 'depth': 6, 'products': 50_000, 'reviews': 250_000},
+    'large': {'users': 20_000, 'roots': 8, 'fanout': 3, 'depth': 8, 'products': 500_000, 'reviews': 2_000_000},
+}
+
+
+def category_rows(roots: int, fanout: int, depth: int) -> list[dict]:
+    rows = [{'id': i + 1, 'name': f'Category {i + 1}', 'slug': f'category-{i + 1}', 'parent_id': None}
+            for i in range(roots)]
+    level = [row['id'] for row in rows]
+    for _ in range(depth):
+        next_level = []
+        for parent_id in level:
+            for _ in range(fanout):
+                category_id = len(rows) + 1
+                rows.append({'id': category_id, 'name': f'Category {category_id}', 'slug': f'category-{category_id}',
+                             'parent_id': parent_id})
+                next_level.append(category_id)
+        level = next_level
+    return rows
+
+
+def user_rows(count: int, hashed_password: str) -> list[dict]:
+    # User 1 is the admin, then one supplier in ten; everyone else is a customer
+    return [{'id': i, 'username': f'user-{i}', 'email': f'user-{i}@bench.example', 'first_name': 'Bench',
+             'last_name': f'User {i}', 'hashed_password': hashed_password, 'is_active': True,
+             'is_admin': i == 1, 'is_supplier': i % 10 == 0, 'is_customer': i % 10 != 0}
+            for i in range(1, count + 1)]
+
+
+def product_rows(rng: random.Random, count: int, categories: int, users: int) -> list[dict]:
+    # Every 50th product is inactive; low ids, which take most of the workload traffic, stay visible
+    suppliers = list(range(10, users + 1, 10)) or [1]
+    return [{'id': i, 'name': f'Product {i}', 'slug': f'product-{i}', 'description': f'Description of product {i}',
+             'price': rng.randint(100, 100_000), 'image_url': f'https://cdn.example.com/{i}.jpg',
+             'stock': 0 if rng.random() < 0.1 else rng.randint(1, 500), 'supplier_id': rng.choice(suppliers),
+             'category_id': rng.randint(1, categories), 'is_active': i % 50 != 0,
+             'rating': 0.0, 'rating_count': 0, 'rating_sum': 0}
+            for i in range(1, count + 1)]
+
+
+def review_rows(rng: random.Random, count: int, products: list[dict], users: int) -> tuple[list[dict], list[dict]]:
+    # Skewed towards low product ids so some products have long review lists to page through
+    started = datetime(2024, 1, 1)
+    ratings, reviews = [], []
+    for i in range(1, count + 1):
+        product = products[min(int(rng.paretovariate(1.2)) - 1, len(products) - 1)]
+        grade = rng.randint(1, 5)
+        user_id = rng.randint(1, users)
+        ratings.append({'id': i, 'grade': grade, 'user_id': user_id, 'product_id': product['id'], 'is_active': True})
+        reviews.append({'id': i, 'user_id': user_id, 'product_id': product['id'], 'rating_id': i,
+                        'comment': f'Review {i} of product {product["id"]}', 'is_active': True,
+                        'comment_date': started + timedelta(seconds=rng.randint(0, 3 * 365 * 86400))})
+        product['rating_count'] += 1
+        product['rating_sum'] += grade
+    for product in products:
+        if product['rating_count']:
+            product['rating'] = product['rating_sum'] / product['rating_count']
+    return ratings, reviews
+
+
+async def insert_rows(session: AsyncSession, model, rows: list[dict]):
+    for start in range(0, len(rows), BATCH_SIZE):
+        await session.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+
+async def generate(url: str, scale: str, seed: int) -> dict:
+    """Create the schema at ``url`` and fill it; returns the manifest the workloads are driven from."""
+    sizes = SCALES[scale]
+    rng = random.Random(seed)
+    categories = category_rows(sizes['roots'], sizes['fanout'], sizes['depth'])
+    products = product_rows(rng, sizes['products'], len(categories), sizes['users'])
+    ratings, reviews = review_rows(rng, sizes['reviews'], products, sizes['users'])
+
+    engine = create_async_engine(url)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with session_maker() as session:
+        # One hash for every user: the login storm measures verification, not seeding
+        await insert_rows(session, User, user_rows(sizes['users'], bcrypt_context.hash(PASSWORD)))
+        await insert_rows(session, Category, categories)
+        await insert_rows(session, Product, products)
+        await insert_rows(session, Rating, ratings)
+        await insert_rows(session, Review, reviews)
+        if engine.dialect.name == 'postgresql':
+            # Rows were inserted with explicit ids; move the sequences past them for the write workloads
+            for model in (User, Category, Product, Rating, Review):
+                table = model.__tablename__
+                await session.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                                           f"(SELECT max(id) FROM {table}))"))
+        await session.commit()
+    await engine.dispose()
+
+    return {
+        'scale': scale,
+        'seed': seed,
+        'users': sizes['users'],
+        'categories': len(categories),
+        'products': len(products),
+        'reviews': len(reviews),
+        'password': PASSWORD,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', required=True)
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(generate(args.url, args.scale, args.seed)), indent=2))
@@ -0,0 +1,26 @@
+"""Environment shared by the benchmark scripts; import it before anything from app.
+
+Settings refuses to load without the DB_* and JWT variables, even in scripts that never connect to
+the configured database, so unset ones get throwaway values. Anything already set wins.
+"""
+import os
+import tempfile
+
+DEFAULTS = {
+    'DB_HOST': 'localhost', 'DB_PORT': '5432', 'DB_USER': 'bench', 'DB_PASS': 'bench', 'DB_NAME': 'bench',
+    'SECRET_KEY': 'bench', 'ALGORITHM': 'HS256',
+    # Every simulated client shares one address; throttling would hide what is measured
+    'RATE_LIMIT_ENABLED': 'false',
+}
+
+
+def use_defaults(**overrides: str):
+    for name, value in {**DEFAULTS, **overrides}.items():
+        os.environ.setdefault(name, value)
+
+
+def enter_workdir() -> str:
+    """Move into a fresh scratch directory and return it; app.main opens its log files relative to it."""
+    workdir = tempfile.mkdtemp()
+    os.chdir(workdir)
+    return workdir
@@ -0,0 +1,184 @@
+"""Seed a synthetic catalog, run the scripted workloads and write throughput/p50/p99 as JSON.
+
+    python -m benchmarks.run --scale small --output before.json
+    python -m benchmarks.run --target uvicorn --workers 2 --output after.json
+    python -m benchmarks.compare before.json after.json
+
+--target asgi drives app.main.app in-process; --target uvicorn starts a local uvicorn and goes through
+real sockets. Both use DB_URL, a fresh SQLite file unless it is set; a PostgreSQL DB_URL must be an
+empty scratch database, or already seeded at the same scale with --no-seed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.environment import enter_workdir, use_defaults
+
+repo_root = os.getcwd()
+workdir = enter_workdir()
+use_defaults(DB_URL=f'sqlite+aiosqlite:///{workdir}/bench.db')
+
+import httpx
+
+from app.backend.db import engine
+from app.main import app
+from benchmarks.datagen import SCALES, PASSWORD, generate
+from benchmarks.workloads import WORKLOADS, build_context
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=repo_root, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_workload(client: httpx.AsyncClient, name: str, context: dict, requests: int, warmup: int,
+                       concurrency: int, seed: int) -> dict:
+    workload = WORKLOADS[name]
+    rng = random.Random(f'{seed}:{name}:warmup')
+    for _ in range(warmup):
+        await workload(client, rng, context)
+
+    remaining = iter(range(requests))
+    latencies = []
+    statuses = {}
+
+    async def worker(index: int):
+        rng = random.Random(f'{seed}:{name}:{index}')
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                code = (await workload(client, rng, context)).status_code
+            except httpx.HTTPError as ex:
+                code = type(ex).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[code] = statuses.get(code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': sum(count for code, count in statuses.items() if not isinstance(code, int) or code >= 400),
+        'statuses': {str(code): count for code, count in sorted(statuses.items(), key=str)},
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(requests / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+        'p90_ms': round(percentile(latencies, 0.9) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'max_ms': round(max(latencies) * 1000, 3),
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_uvicorn(port: int, workers: int) -> subprocess.Popen:
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, (repo_root, os.environ.get('PYTHONPATH'))))}
+    return subprocess.Popen([sys.executable, '-m', 'uvicorn', 'app.main:app', '--host', '127.0.0.1',
+                             '--port', str(port), '--workers', str(workers), '--no-access-log',
+                             '--log-level', 'warning'], cwd=workdir, env=env)
+
+
+async def wait_ready(client: httpx.AsyncClient, server: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'uvicorn exited with {server.returncode}')
+        try:
+            await client.get('/')
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError('uvicorn did not start in time')
+
+
+async def run_all(client: httpx.AsyncClient, args, context: dict) -> dict:
+    results = {}
+    for name in args.workloads:
+        # Every login is a full bcrypt verification, so the storm gets its own, smaller request count
+        requests = args.login_requests if name == 'login_storm' else args.requests
+        results[name] = await run_workload(client, name, context, requests, min(args.warmup, requests),
+                                           args.concurrency, args.seed)
+    return results
+
+
+async def main(args):
+    url = os.environ['DB_URL']
+    if args.no_seed:
+        sizes = SCALES[args.scale]
+        manifest = {'scale': args.scale, 'seed': args.seed, 'users': sizes['users'], 'password': PASSWORD,
+                    'categories': sizes['roots'] * sum(sizes['fanout'] ** level for level in range(sizes['depth'] + 1)),
+                    'products': sizes['products'], 'reviews': sizes['reviews']}
+    else:
+        manifest = await generate(url, args.scale, args.seed)
+    context = await build_context(manifest)
+
+    results = {
+        'commit': git_commit(),
+        'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'target': args.target,
+        'database': engine.dialect.name,
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'data': manifest,
+    }
+    if args.target == 'asgi':
+        # ASGITransport does not send lifespan events; run them so the app starts as it would under uvicorn
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://bench') as client:
+                results['workloads'] = await run_all(client, args, context)
+    else:
+        port = free_port()
+        server = start_uvicorn(port, args.workers)
+        results['uvicorn_workers'] = args.workers
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        try:
+            async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', limits=limits) as client:
+                await wait_ready(client, server)
+                results['workloads'] = await run_all(client, args, context)
+        finally:
+            server.terminate()
+            server.wait(10)
+    await engine.dispose()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(os.path.join(repo_root, args.output), 'w') as file:
+            file.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--target', choices=('asgi', 'uvicorn'), default='asgi')
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--workloads', nargs='+', choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument('--requests', type=int, default=2000, help='per workload')
+    parser.add_argument('--login-requests', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=50, help='unmeasured requests per workload')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=1, help='uvicorn worker processes')
+    parser.add_argument('--no-seed', action='store_true', help='DB_URL is already seeded at this scale and seed')
+    parser.add_argument('--output', help='also write the results to this file')
+    asyncio.run(main(parser.parse_args()))
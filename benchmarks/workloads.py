@@ -0,0 +1,61 @@
+"""Scripted request mixes for benchmarks.run; each function makes one request and returns the response.
+
+Every worker draws from its own seeded random.Random, so a workload issues the same requests in the
+same order on every run.
+"""
+import random
+from datetime import timedelta
+
+import httpx
+
+from app.services.auth_helpers import create_access_token
+
+ORDERS = ('id', 'price', '-price', '-rating')
+
+
+def hot_id(rng: random.Random, count: int) -> int:
+    # Long-tailed like real traffic: a few products get most of the views
+    return min(int(rng.paretovariate(1.2)), count)
+
+
+async def browse_category(client: httpx.AsyncClient, rng: random.Random, context: dict) -> httpx.Response:
+    slug = f'category-{rng.randint(1, context["categories"])}'
+    return await client.get(f'/products/{slug}', params={'limit': 20, 'order_by': rng.choice(ORDERS)})
+
+
+async def product_detail(client: httpx.AsyncClient, rng: random.Random, context: dict) -> httpx.Response:
+    return await client.get(f'/products/detail/product-{hot_id(rng, context["products"])}')
+
+
+async def review_listing(client: httpx.AsyncClient, rng: random.Random, context: dict) -> httpx.Response:
+    return await client.get(f'/reviews/product-{hot_id(rng, context["products"])}', params={'limit': 20})
+
+
+async def login_storm(client: httpx.AsyncClient, rng: random.Random, context: dict) -> httpx.Response:
+    return await client.post('/auth/token', data={'username': f'user-{rng.randint(1, context["users"])}',
+                                                  'password': context['password']})
+
+
+async def review_write_burst(client: httpx.AsyncClient, rng: random.Random, context: dict) -> httpx.Response:
+    token = rng.choice(context['customer_tokens'])
+    # add_review is mounted without a separating slash
+    return await client.post('/reviewscreate', params={'product_slug': f'product-{hot_id(rng, context["products"])}'},
+                             json={'comment': 'Benchmark review', 'grade': rng.randint(1, 5)},
+                             headers={'Authorization': f'Bearer {token}'})
+
+
+WORKLOADS = {
+    'browse_category': browse_category,
+    'product_detail': product_detail,
+    'review_listing': review_listing,
+    'login_storm': login_storm,
+    'review_write_burst': review_write_burst,
+}
+
+
+async def build_context(manifest: dict, tokens: int = 50) -> dict:
+    """The datagen manifest plus access tokens for customers, so writes do not pay for logins."""
+    customers = [user_id for user_id in range(2, manifest['users'] + 1) if user_id % 10][:tokens]
+    customer_tokens = [await create_access_token(f'user-{user_id}', user_id, False, False, True, timedelta(hours=1))
+                       for user_id in customers]
+    return {**manifest, 'customer_tokens': customer_tokens}
@@ -1,3 +1,5 @@
+import os
+
 from pydantic_settings import BaseSettings
 
 
@@ -7,14 +9,122 @@ class Settings(BaseSettings):
     DB_USER: str
     DB_PASS: str
     DB_NAME: str
+    DB_URL: str | None = None
+
+    DB_REPLICA_URLS: list[str] = []
+    DB_REPLICA_STRATEGY: str = 'round_robin'
+    DB_REPLICA_RETRY_AFTER: float = 30
+    # A replica may not have applied a write for this long, so reads go to the primary after each invalidation
+    DB_REPLICA_MAX_LAG: float = 5
+
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
 
     SECRET_KEY: str
     ALGORITHM: str
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 20
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    REFRESH_TOKEN_SWEEP_INTERVAL: float = 3600
+    REFRESH_TOKEN_SWEEP_BATCH: int = 1000
+    TOKEN_CACHE_SIZE: int = 10_000
+    REVOCATION_BACKEND: str = 'memory'
+    REVOCATION_REDIS_URL: str | None = None
+
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = 'memory'
+    RATE_LIMIT_REDIS_URL: str | None = None
+    RATE_LIMIT_EVICTION_INTERVAL: float = 60
+    # Set when behind a proxy that appends the client address, e.g. 'x-forwarded-for'
+    RATE_LIMIT_FORWARDED_HEADER: str | None = None
+    # limit name -> '<count>/<second|minute|hour|day>'; routes pick theirs by name
+    RATE_LIMITS: dict[str, str] = {
+        'login': '10/minute',
+        'register': '5/minute',
+        'review_user': '10/minute',
+        'review_ip': '30/minute',
+    }
+
+    BCRYPT_ROUNDS: int = 12
+    # Hashing threads compete with the event loop for CPU, so leave it half of the cores
+    PASSWORD_HASH_WORKERS: int = max(1, (os.cpu_count() or 2) // 2)
+    PASSWORD_HASH_QUEUE_MAX: int = 32
+    PASSWORD_HASH_RETRY_AFTER: int = 1
+
+    PAGE_SIZE_DEFAULT: int = 20
+    PAGE_SIZE_MAX: int = 100
+
+    CATEGORY_TREE_TTL: float = 300
+
+    PRODUCT_FILTER_GUARD_ROWS: int = 100_000
+    PRODUCT_ROW_ESTIMATE_TTL: float = 600
+
+    BULK_IMPORT_BATCH_SIZE: int = 1000
+    BULK_IMPORT_MAX_ERRORS: int = 1000
+    BULK_IMPORT_MAX_RECORD_BYTES: int = 1_048_576
+    BULK_UPDATE_BATCH_SIZE: int = 500
+    BULK_UPDATE_MAX_ITEMS: int = 100_000
+    RESERVATION_TTL: float = 900
+    RESERVATION_SWEEP_INTERVAL: float = 30
+    RESERVATION_SWEEP_BATCH: int = 500
+
+    # 'memory' runs jobs on the API process; 'database' queues them in background_jobs for
+    # `python -m app.services.tasks` workers, and needs CACHE_BACKEND=redis so their invalidations reach the API
+    TASK_QUEUE_BACKEND: str = 'memory'
+    TASK_QUEUE_SIZE: int = 10_000
+    TASK_QUEUE_WORKERS: int = 4
+    TASK_MAX_ATTEMPTS: int = 5
+    TASK_RETRY_DELAY: float = 1
+    TASK_DRAIN_TIMEOUT: float = 10
+    TASK_POLL_INTERVAL: float = 1
+    TASK_CLAIM_BATCH: int = 20
+    # Running jobs older than this are assumed lost with their worker and are handed out again
+    TASK_JOB_TIMEOUT: float = 300
+
+    EXPORT_BATCH_SIZE: int = 1000
+    EXPORT_GZIP_LEVEL: int = 6
+
+    SEARCH_MODE: str = 'auto'
+    SEARCH_LANGUAGE: str = 'simple'
+    SEARCH_PRICE_BUCKETS: list[int] = [1000, 5000, 10000, 50000]
+
+    ACCESS_LOG_PATH: str = 'access.log'
+    ACCESS_LOG_MAX_BYTES: int = 50 * 1024 * 1024
+    ACCESS_LOG_BACKUPS: int = 5
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+    ACCESS_LOG_SLOW_MS: float = 1000
+    ACCESS_LOG_BATCH_SIZE: int = 256
+    ACCESS_LOG_FLUSH_INTERVAL: float = 1.0
+    ACCESS_LOG_QUEUE_SIZE: int = 10_000
+
+    # 'off' in production; 'log' or 'raise' in development and test runs
+    QUERY_BUDGET_MODE: str = 'off'
+    QUERY_BUDGET_DEFAULT: int = 20
+    # 'METHOD /route/template' or '/route/template' -> budget; None exempts the route
+    QUERY_BUDGETS: dict[str, int | None] = {
+        'POST /products/bulk': None,
+        'PATCH /products/bulk': None,
+        'GET /products/export': None,
+    }
+    QUERY_REPEAT_THRESHOLD: int = 5
+
+    CACHE_BACKEND: str = 'memory'
+    CACHE_REDIS_URL: str | None = None
+    CACHE_TTL: float = 60
+    CACHE_MAX_ENTRIES: int = 2048
+
     class Config:
         env_file = ".env"
 
     @property
     def DATABASE_URL(self):
+        if self.DB_URL:
+            return self.DB_URL
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
 
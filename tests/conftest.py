@@ -0,0 +1,146 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+for name, value in {'DB_HOST': 'localhost', 'DB_PORT': '5432', 'DB_USER': 'test', 'DB_PASS': 'test',
+                    'DB_NAME': 'test', 'SECRET_KEY': 'test', 'ALGORITHM': 'HS256', 'BCRYPT_ROUNDS': '4'}.items():
+    os.environ.setdefault(name, value)
+
+# app.main opens its log files relative to the working directory
+os.chdir(tempfile.mkdtemp())
+
+import httpx
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.backend import db_depends
+from app.backend.db import Base
+from app.backend.query_stats import track_queries
+from app.main import app
+from app.models import *
+from app.services import cache, rate_limit
+from app.services.auth_helpers import create_access_token
+from app.services.category_tree import category_tree_cache
+from app.services.jobs import task_queue
+from app.services.query_budget import QueryRecorder, record_queries
+from app.services.security import bcrypt_context
+from config import settings
+from tests.fakes import FakeClock
+
+PASSWORD = 'test-password'
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'max_queries(limit, route=None): fail the test if a request it makes '
+                                       'issues more than limit SQL statements')
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """Patch it in as a module's ``time`` to move that module's time forward; starts on a minute boundary."""
+    return FakeClock(1_700_000_040.0)
+
+
+@pytest.fixture
+async def session_maker(tmp_path):
+    engine = create_async_engine(f'sqlite+aiosqlite:///{tmp_path}/test.db')
+    track_queries(engine)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    await engine.dispose()
+
+
+@pytest.fixture
+async def catalog(session_maker):
+    """Admin (1), supplier (2) and customer (3); categories electronics > phones > smartphones;
+    products product-1..product-30, with 10 reviews on product-1."""
+    hashed_password = bcrypt_context.hash(PASSWORD)
+    async with session_maker() as session:
+        await session.execute(insert(User), [
+            {'id': 1, 'username': 'admin', 'email': 'admin@test', 'hashed_password': hashed_password,
+             'is_admin': True, 'is_customer': False},
+            {'id': 2, 'username': 'supplier', 'email': 'supplier@test', 'hashed_password': hashed_password,
+             'is_supplier': True, 'is_customer': False},
+            {'id': 3, 'username': 'customer', 'email': 'customer@test', 'hashed_password': hashed_password},
+        ])
+        await session.execute(insert(Category), [
+            {'id': 1, 'name': 'Electronics', 'slug': 'electronics'},
+            {'id': 2, 'name': 'Phones', 'slug': 'phones', 'parent_id': 1},
+            {'id': 3, 'name': 'Smartphones', 'slug': 'smartphones', 'parent_id': 2},
+        ])
+        await session.execute(insert(Product), [
+            {'id': i, 'name': f'Product {i}', 'slug': f'product-{i}', 'description': f'Description {i}',
+             'price': i * 100, 'image_url': f'{i}.jpg', 'stock': i % 5, 'supplier_id': 2,
+             'category_id': i % 3 + 1, 'rating': 0.0, 'rating_count': 0, 'rating_sum': 0}
+            for i in range(1, 31)
+        ])
+        grades = [5, 4, 3, 5, 4, 2, 5, 5, 1, 4]
+        await session.execute(insert(Rating), [
+            {'id': i, 'grade': grade, 'user_id': 3, 'product_id': 1} for i, grade in enumerate(grades, 1)
+        ])
+        await session.execute(insert(Review), [
+            {'id': i, 'user_id': 3, 'product_id': 1, 'rating_id': i, 'comment': f'Review {i}',
+             'comment_date': datetime(2024, 1, 1) + timedelta(days=i)} for i in range(1, len(grades) + 1)
+        ])
+        await session.execute(Product.__table__.update().where(Product.id == 1)
+                              .values(rating_count=len(grades), rating_sum=sum(grades),
+                                      rating=sum(grades) / len(grades)))
+        await session.commit()
+    return session_maker
+
+
+@pytest.fixture
+async def client(session_maker, monkeypatch):
+    async def get_test_db():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[db_depends.get_db] = get_test_db
+    app.dependency_overrides[db_depends.get_read_db] = get_test_db
+    app.dependency_overrides[db_depends.get_read_session_maker] = lambda: session_maker
+    # Per-worker state that would otherwise leak between tests
+    monkeypatch.setattr(cache.response_cache, 'backend',
+                        cache.InMemoryCache(max_entries=settings.CACHE_MAX_ENTRIES, ttl=settings.CACHE_TTL))
+    monkeypatch.setattr(rate_limit, 'rate_limiter',
+                        rate_limit.InMemoryRateLimiter(eviction_interval=settings.RATE_LIMIT_EVICTION_INTERVAL))
+    monkeypatch.setattr(task_queue, 'session_maker', session_maker)
+    category_tree_cache.invalidate()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+async def customer_headers() -> dict:
+    token = await create_access_token('customer', 3, False, False, True, timedelta(minutes=5))
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+async def admin_headers() -> dict:
+    token = await create_access_token('admin', 1, True, False, False, timedelta(minutes=5))
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def query_budget(request) -> QueryRecorder:
+    """SQL statements per request made through ``client``; a ``max_queries(limit)`` marker is checked at teardown."""
+    with record_queries() as recorder:
+        yield recorder
+        marker = request.node.get_closest_marker('max_queries')
+        if marker is not None:
+            recorder.assert_max_queries(*marker.args, **marker.kwargs)
+
+
+@pytest.fixture(autouse=True)
+def _max_queries_marker(request):
+    if request.node.get_closest_marker('max_queries') is not None:
+        request.getfixturevalue('query_budget')
@@ -0,0 +1,88 @@
+class FakeClock:
+    """Stands in for the ``time`` module where a test needs to move time forward."""
+
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class FakeRedis:
+    """The subset of the redis.asyncio client the Redis backends use, kept in a dict.
+
+    Values come back as bytes and keys expire on ``clock``, as they would from a real server.
+    """
+
+    def __init__(self, clock: FakeClock | None = None):
+        self.clock = clock or FakeClock()
+        self.data: dict[str, bytes | set[bytes]] = {}
+        self.expires_at: dict[str, float] = {}
+
+    def _live(self, key: str):
+        expires_at = self.expires_at.get(key)
+        if expires_at is not None and expires_at <= self.clock.time():
+            self.data.pop(key, None)
+            self.expires_at.pop(key, None)
+        return self.data.get(key)
+
+    @staticmethod
+    def _encode(value) -> bytes:
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    async def get(self, key: str) -> bytes | None:
+        return self._live(key)
+
+    async def set(self, key: str, value, ex: int | None = None):
+        self.data[key] = self._encode(value)
+        self.expires_at.pop(key, None)
+        if ex is not None:
+            self.expires_at[key] = self.clock.time() + ex
+        return True
+
+    async def incr(self, key: str) -> int:
+        value = int(self._live(key) or 0) + 1
+        self.data[key] = self._encode(value)
+        return value
+
+    async def decr(self, key: str) -> int:
+        value = int(self._live(key) or 0) - 1
+        self.data[key] = self._encode(value)
+        return value
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        if self._live(key) is None:
+            return False
+        self.expires_at[key] = self.clock.time() + seconds
+        return True
+
+    async def exists(self, *keys: str) -> int:
+        return sum(self._live(key) is not None for key in keys)
+
+    async def sadd(self, key: str, *members) -> int:
+        members = {self._encode(member) for member in members}
+        current = self._live(key)
+        if current is None:
+            current = self.data[key] = set()
+        added = len(members - current)
+        current |= members
+        return added
+
+    async def smembers(self, key: str):
+        return set(self._live(key) or ())
+
+    async def delete(self, *keys) -> int:
+        deleted = 0
+        for key in keys:
+            key = key.decode() if isinstance(key, bytes) else key
+            if self._live(key) is not None:
+                deleted += 1
+            self.data.pop(key, None)
+            self.expires_at.pop(key, None)
+        return deleted
@@ -0,0 +1,80 @@
+import csv
+
+import pytest
+
+from app.services.bulk_import import UploadError, iter_csv_records, iter_line_batches, iter_ndjson_records
+
+pytestmark = pytest.mark.anyio
+
+HEADER = b'name,description,price,image_url,stock,category_id\n'
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def csv_records(*chunks: bytes) -> list:
+    return [record async for record in iter_csv_records(iter_line_batches(stream(*chunks)))]
+
+
+async def test_csv_quote_inside_unquoted_field():
+    records = await csv_records(HEADER + b'TV 55" screen,d,10,u,5,1\nRadio,d,10,u,5,1\nLamp,d,10,u,5,1\n')
+    assert [data['name'] for _, data, _ in records] == ['TV 55" screen', 'Radio', 'Lamp']
+    assert [row_number for row_number, _, _ in records] == [1, 2, 3]
+
+
+async def test_csv_quoted_field_across_lines_and_chunks():
+    records = await csv_records(HEADER + b'"Desk\r\n', b'lamp","with ""quotes"",\n', b'and commas",10,u,5,1\nFan,d,1')
+    assert records[0] == (1, {'name': 'Desk\nlamp', 'description': 'with "quotes",\nand commas', 'price': '10',
+                              'image_url': 'u', 'stock': '5', 'category_id': '1'}, None)
+    assert records[1] == (2, None, 'Expected 6 columns, got 3')
+
+
+async def test_csv_skips_blank_lines():
+    records = await csv_records(b'\xef\xbb\xbf' + HEADER + b'\n  \nRadio,d,10,u,5,1\n\n')
+    assert [(row_number, data['name']) for row_number, data, _ in records] == [(1, 'Radio')]
+
+
+async def test_csv_unterminated_quoted_field():
+    with pytest.raises(UploadError, match='Row 2 has an unterminated quoted field'):
+        await csv_records(HEADER + b'Radio,d,10,u,5,1\n"Lamp,d,10,u,5,1\nFan,d,10,u,5,1\n')
+
+
+async def test_ndjson_records():
+    records = [record async for record in iter_ndjson_records(iter_line_batches(stream(
+        b'{"name": "Radio"}\r\n\n[1]\n{"na', b'me": "Lamp"}')))]
+    assert records == [(1, {'name': 'Radio'}, None), (2, None, 'Expected a JSON object'), (3, {'name': 'Lamp'}, None)]
+
+
+async def test_bulk_upload(client, catalog, admin_headers):
+    body = HEADER + b'TV 55" screen,d,10,u,5,1\nRadio,d,10,u,5,1\nLamp,d,10,u,5,9\n'
+    response = await client.post('/products/bulk', content=body,
+                                 headers={**admin_headers, 'Content-Type': 'text/csv'})
+    report = response.json()
+    assert (report['rows'], report['inserted'], report['failed']) == (3, 2, 1)
+    assert report['errors'] == [{'row': 3, 'errors': ['category_id: Category 9 does not exist']}]
+    assert (await client.get('/products/detail/tv-55-screen')).json()['name'] == 'TV 55" screen'
+
+
+async def test_csv_field_larger_than_the_csv_module_default():
+    description = 'x' * 200_000
+    records = await csv_records(HEADER + f'Radio,"{description}",10,u,5,1\n'.encode())
+    assert records[0][1]['description'] == description
+
+
+@pytest.fixture
+def small_field_limit():
+    # Stands in for a field over BULK_IMPORT_MAX_RECORD_BYTES that arrived inside one chunk
+    limit = csv.field_size_limit(1000)
+    yield
+    csv.field_size_limit(limit)
+
+
+async def test_csv_field_over_the_limit_aborts(client, catalog, admin_headers, small_field_limit):
+    body = HEADER + b'Radio,d,10,u,5,1\nLamp,"' + b'x' * 2000 + b'",10,u,5,1\n'
+    response = await client.post('/products/bulk', content=body,
+                                 headers={**admin_headers, 'Content-Type': 'text/csv'})
+    report = response.json()
+    assert report['aborted'].startswith('Row 2 could not be parsed: field larger than field limit')
+    assert (report['rows'], report['inserted']) == (1, 1)
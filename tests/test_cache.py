@@ -0,0 +1,66 @@
+import pytest
+
+from app.services.cache import InMemoryCache, RedisCache, ResponseCache
+from tests.fakes import FakeRedis
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def backend(request, clock, monkeypatch):
+    if request.param == 'redis':
+        return RedisCache(FakeRedis(clock), ttl=60)
+    monkeypatch.setattr('app.services.cache.time', clock)
+    return InMemoryCache(max_entries=100, ttl=60)
+
+
+async def test_set_and_get(backend):
+    assert await backend.get('products?limit=20') is None
+    await backend.set('products?limit=20', b'page', ['products'])
+    assert await backend.get('products?limit=20') == b'page'
+
+
+async def test_entries_expire(backend, clock):
+    await backend.set('products?limit=20', b'page', ['products'])
+    clock.advance(61)
+    assert await backend.get('products?limit=20') is None
+
+
+async def test_invalidate_by_tag(backend):
+    await backend.set('products?limit=20', b'page', ['products'])
+    await backend.set('product:product-1', b'detail', ['products', 'product:product-1'])
+    await backend.set('product:product-2', b'detail', ['products', 'product:product-2'])
+    await backend.set('categories', b'tree', ['categories'])
+
+    await backend.invalidate_tags('product:product-1')
+    assert await backend.get('product:product-1') is None
+    assert await backend.get('product:product-2') == b'detail'
+
+    await backend.invalidate_tags('products', 'unknown')
+    assert [await backend.get(key) for key in ('products?limit=20', 'product:product-2')] == [None, None]
+    assert await backend.get('categories') == b'tree'
+
+
+async def test_redis_cache_keys_are_prefixed():
+    client = FakeRedis()
+    await RedisCache(client, ttl=60, prefix='app:').set('products', b'page', ['products'])
+    assert await client.get('app:products') == b'page'
+    assert await client.smembers('app:tag:products') == {b'app:products'}
+
+
+async def test_response_cache_over_redis():
+    cache = ResponseCache(RedisCache(FakeRedis(), ttl=60))
+    calls = []
+
+    @cache.cached('product', tags=lambda kwargs: ['products', f'product:{kwargs["slug"]}'])
+    async def detail(slug: str):
+        calls.append(slug)
+        return {'slug': slug}
+
+    for _ in range(2):
+        assert (await detail(slug='product-1')).body == b'{"slug":"product-1"}'
+    await cache.invalidate('product:product-1')
+    await detail(slug='product-1')
+    assert calls == ['product-1', 'product-1']
+    assert (cache.hits, cache.misses) == (1, 2)
+
@@ -0,0 +1,41 @@
+import pytest
+
+from app.services.category_tree import CategoryTree, CategoryTreeCache
+
+pytestmark = pytest.mark.anyio
+
+
+class CountingSession:
+    def __init__(self):
+        self.loads = 0
+
+    async def execute(self, query):
+        self.loads += 1
+        return self
+
+    def all(self):
+        return [(1, 'electronics', None), (2, 'phones', 1), (3, 'smartphones', 2), (4, 'loop', 4)]
+
+
+def test_subtree_ids():
+    tree = CategoryTree(CountingSession().all())
+    assert tree.subtree_ids('electronics') == [1, 2, 3]
+    assert tree.subtree_ids('loop') == [4]
+    assert tree.subtree_ids('missing') is None
+
+
+async def test_tree_is_reloaded_after_invalidation_and_ttl(clock, monkeypatch):
+    monkeypatch.setattr('app.services.category_tree.time', clock)
+    cache = CategoryTreeCache(ttl=300)
+    session = CountingSession()
+
+    await cache.get(session)
+    await cache.get(session)
+    assert session.loads == 1
+    cache.invalidate()
+    await cache.get(session)
+    assert session.loads == 2
+    clock.advance(300)
+    await cache.get(session)
+    assert session.loads == 3
+
@@ -0,0 +1,39 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_product_list(client, catalog, query_budget):
+    response = await client.get('/products/', params={'limit': 20})
+    assert response.status_code == 200
+    assert len(response.json()['items']) == 20
+    query_budget.assert_max_queries(3, route='/products/')
+
+
+async def test_category_listing_does_not_grow_with_the_subtree(client, catalog, query_budget):
+    for slug in ('smartphones', 'phones', 'electronics'):
+        response = await client.get(f'/products/{slug}')
+        assert response.status_code == 200
+    query_budget.assert_max_queries(4, route='/products/{category_slug}')
+    query_budget.assert_no_repeated_queries()
+
+
+async def test_product_detail(client, catalog, query_budget):
+    response = await client.get('/products/detail/product-1')
+    assert response.status_code == 200
+    query_budget.assert_max_queries(2, route='/products/detail/{product_slug}')
+
+
+async def test_review_listing_does_not_grow_with_the_page(client, catalog, query_budget):
+    response = await client.get('/reviews/product-1', params={'limit': 10})
+    assert response.status_code == 200
+    assert len(response.json()['items']) == 10
+    query_budget.assert_max_queries(3, route='/reviews/{product_slug}')
+    query_budget.assert_no_repeated_queries()
+
+
+@pytest.mark.max_queries(8, route='/reviewscreate')
+async def test_add_review(client, catalog, customer_headers, query_budget):
+    response = await client.post('/reviewscreate', params={'product_slug': 'product-2'},
+                                 json={'comment': 'Works', 'grade': 4}, headers=customer_headers)
+    assert response.json()['status_code'] == 201
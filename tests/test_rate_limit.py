@@ -0,0 +1,103 @@
+import pytest
+
+from app.services import rate_limit
+from app.services.rate_limit import InMemoryRateLimiter, RedisRateLimiter, parse_limit
+from tests.fakes import FakeRedis
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def frozen_time(clock, monkeypatch):
+    # clock starts on a window boundary, which keeps the sliding window's arithmetic easy to follow
+    monkeypatch.setattr(rate_limit, 'time', clock)
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def limiter(request, clock):
+    if request.param == 'redis':
+        return RedisRateLimiter(FakeRedis(clock))
+    return InMemoryRateLimiter(eviction_interval=60)
+
+
+def test_parse_limit():
+    assert parse_limit('10/minute') == (10, 60.0)
+    for spec in ('10', '0/minute', 'ten/minute', '10/fortnight'):
+        with pytest.raises(ValueError):
+            parse_limit(spec)
+
+
+async def test_allows_up_to_the_limit_then_denies(limiter):
+    for _ in range(10):
+        assert await limiter.hit('login:ip:1.2.3.4', 10, 60) == 0
+    retry_after = await limiter.hit('login:ip:1.2.3.4', 10, 60)
+    assert 0 < retry_after <= 120
+    assert await limiter.hit('login:ip:5.6.7.8', 10, 60) == 0
+
+
+async def test_allows_again_after_retry_after(limiter, clock):
+    for _ in range(10):
+        await limiter.hit('login:ip:1.2.3.4', 10, 60)
+    retry_after = await limiter.hit('login:ip:1.2.3.4', 10, 60)
+    clock.advance(retry_after)
+    assert await limiter.hit('login:ip:1.2.3.4', 10, 60) == 0
+
+
+async def test_in_memory_refills_one_token_per_interval(clock):
+    limiter = InMemoryRateLimiter(eviction_interval=60)
+    for _ in range(10):
+        await limiter.hit('key', 10, 60)
+    assert await limiter.hit('key', 10, 60) == pytest.approx(6)
+    clock.advance(3)
+    assert await limiter.hit('key', 10, 60) == pytest.approx(3)
+
+
+async def test_in_memory_evicts_full_buckets(clock):
+    limiter = InMemoryRateLimiter(eviction_interval=60)
+    await limiter.hit('key', 10, 60)
+    clock.advance(61)
+    await limiter.hit('other', 10, 60)
+    assert list(limiter._buckets) == ['other']
+
+
+async def test_redis_does_not_count_denied_hits(clock):
+    limiter = RedisRateLimiter(FakeRedis(clock))
+    for _ in range(10):
+        await limiter.hit('key', 10, 60)
+    # The full window slides out of the next one: 10 * 0.9 + 1 fits 66s from now
+    for _ in range(5):
+        assert await limiter.hit('key', 10, 60) == pytest.approx(66)
+    clock.advance(66)
+    assert await limiter.hit('key', 10, 60) == 0
+
+
+async def test_redis_weights_the_previous_window(clock):
+    limiter = RedisRateLimiter(FakeRedis(clock))
+    for _ in range(10):
+        await limiter.hit('key', 10, 60)
+    # Half of the previous window still overlaps: 10 * 0.5 + 5 fills the limit again
+    clock.advance(90)
+    for _ in range(5):
+        assert await limiter.hit('key', 10, 60) == 0
+    assert await limiter.hit('key', 10, 60) == pytest.approx(6)
+
+
+@pytest.fixture
+def login_limit(monkeypatch, clock):
+    monkeypatch.setattr(rate_limit.settings, 'RATE_LIMIT_ENABLED', True)
+    monkeypatch.setitem(rate_limit.limits, 'login', (2, 60.0))
+
+
+@pytest.mark.parametrize('backend, retry_after', [('memory', '30'), ('redis', '90')])
+async def test_login_returns_429_with_retry_after(client, catalog, login_limit, clock, monkeypatch, backend,
+                                                  retry_after):
+    if backend == 'redis':
+        monkeypatch.setattr(rate_limit, 'rate_limiter', RedisRateLimiter(FakeRedis(clock)))
+    form = {'username': 'customer', 'password': 'wrong'}
+    for _ in range(2):
+        assert (await client.post('/auth/token', data=form)).status_code != 429
+    response = await client.post('/auth/token', data=form)
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == retry_after
+    clock.advance(int(retry_after))
+    assert (await client.post('/auth/token', data=form)).status_code != 429
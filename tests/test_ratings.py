@@ -0,0 +1,51 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select, update
+
+from app.models import *
+from app.services.ratings import recompute_product_ratings
+
+pytestmark = pytest.mark.anyio
+
+
+async def aggregates(session, *product_ids: int) -> list[tuple]:
+    query = (select(Product.id, Product.rating_count, Product.rating_sum, Product.rating)
+             .where(Product.id.in_(product_ids)).order_by(Product.id))
+    return [tuple(row) for row in await session.execute(query)]
+
+
+async def test_recompute_all_products(catalog):
+    async with catalog() as session:
+        await session.execute(update(Product).values(rating_count=0, rating_sum=0, rating=0.0))
+        await session.execute(update(Product).where(Product.id == 3).values(rating_count=2, rating_sum=9, rating=4.5))
+        session.add(Rating(grade=2, user_id=3, product_id=2, is_active=False))
+        await session.commit()
+
+        assert await recompute_product_ratings(session) == 2
+        await session.commit()
+        assert await aggregates(session, 1, 2, 3) == [(1, 10, 38, 3.8), (2, 0, 0, 0.0), (3, 0, 0, 0.0)]
+
+
+async def test_recompute_only_writes_products_that_changed(catalog):
+    untouched = datetime(2024, 1, 1)
+    async with catalog() as session:
+        await session.execute(update(Product).values(updated_at=untouched))
+        session.add(Rating(grade=5, user_id=3, product_id=2, is_active=True))
+        await session.commit()
+
+        assert await recompute_product_ratings(session) == 1
+        await session.commit()
+        changed = await session.scalars(select(Product.id).where(Product.updated_at != untouched))
+        assert list(changed) == [2]
+        assert await recompute_product_ratings(session) == 0
+
+
+async def test_recompute_selected_products(catalog):
+    async with catalog() as session:
+        await session.execute(update(Product).values(rating_count=1, rating_sum=1, rating=1.0))
+        await session.commit()
+
+        assert await recompute_product_ratings(session, [1, 2]) == 2
+        await session.commit()
+        assert await aggregates(session, 1, 2, 3) == [(1, 10, 38, 3.8), (2, 0, 0, 0.0), (3, 1, 1, 1.0)]
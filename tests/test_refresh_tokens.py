@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.models import *
+from app.services.refresh_tokens import delete_dead_families
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_delete_dead_families(catalog):
+    now = datetime.utcnow()
+    later, earlier = now + timedelta(days=1), now - timedelta(days=1)
+    tokens = [
+        # family: (expires_at, is_revoked) of each token in it
+        ('rotating', later, True), ('rotating', later, False),
+        ('expired', earlier, True), ('expired', earlier, False),
+        ('revoked', later, True), ('revoked', later, True),
+        ('fresh', later, False),
+    ]
+    async with catalog() as session:
+        await session.execute(insert(RefreshToken), [
+            {'user_id': 3, 'token_hash': f'hash-{i}', 'family_id': family, 'expires_at': expires_at,
+             'is_revoked': is_revoked} for i, (family, expires_at, is_revoked) in enumerate(tokens)
+        ])
+        await session.commit()
+
+        assert await delete_dead_families(session, limit=1) == 1
+        assert await delete_dead_families(session, limit=10) == 1
+        assert await delete_dead_families(session, limit=10) == 0
+        families = await session.scalars(select(RefreshToken.family_id))
+        assert sorted(families) == ['fresh', 'rotating', 'rotating']
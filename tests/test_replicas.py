@@ -0,0 +1,142 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.backend import db_depends, replicas
+from app.backend.replicas import Replica, ReplicaRouter
+from app.services import cache
+
+pytestmark = pytest.mark.anyio
+
+
+def sqlite_file(path, name: str) -> str:
+    """A database whose only table names it, so a read shows where it was routed."""
+    with sqlite3.connect(path) as connection:
+        connection.execute('CREATE TABLE source (name TEXT)')
+        connection.execute('INSERT INTO source VALUES (?)', (name,))
+    return f'sqlite+aiosqlite:///{path}'
+
+
+@pytest.fixture
+async def databases(tmp_path, clock, monkeypatch):
+    """Replicas replica_0..replica_2 and a primary, each in its own SQLite file, on the test clock."""
+    monkeypatch.setattr(replicas, 'time', clock)
+    replica_list = [Replica(f'replica_{index}', sqlite_file(tmp_path / f'replica_{index}.db', f'replica_{index}'))
+                    for index in range(3)]
+    primary = create_async_engine(sqlite_file(tmp_path / 'primary.db', 'primary'))
+    monkeypatch.setattr(db_depends, 'async_session_maker',
+                        async_sessionmaker(primary, expire_on_commit=False, class_=AsyncSession))
+    yield replica_list
+    for replica in replica_list:
+        await replica.engine.dispose()
+    await primary.dispose()
+
+
+def use_router(monkeypatch, router: ReplicaRouter) -> ReplicaRouter:
+    monkeypatch.setattr(db_depends, 'replica_router', router)
+    monkeypatch.setattr(cache, 'replica_router', router)
+    return router
+
+
+async def read_source() -> str:
+    sessions = db_depends.get_read_db()
+    session = await anext(sessions)
+    try:
+        return await session.scalar(text('SELECT name FROM source'))
+    finally:
+        await sessions.aclose()
+
+
+def names(candidates) -> list[str]:
+    return [replica.name for replica in candidates]
+
+
+async def test_round_robin(databases):
+    router = ReplicaRouter(databases, 'round_robin', retry_after=30)
+    assert [names(router.candidates()) for _ in range(4)] == [
+        ['replica_0', 'replica_1', 'replica_2'],
+        ['replica_1', 'replica_2', 'replica_0'],
+        ['replica_2', 'replica_0', 'replica_1'],
+        ['replica_0', 'replica_1', 'replica_2'],
+    ]
+
+
+async def test_least_connections(databases):
+    router = ReplicaRouter(databases, 'least_connections', retry_after=30)
+    async with databases[0].engine.connect(), databases[1].engine.connect(), databases[1].engine.connect():
+        assert names(router.candidates()) == ['replica_2', 'replica_0', 'replica_1']
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        ReplicaRouter([], 'random', retry_after=30)
+
+
+async def test_reads_rotate_over_replicas(databases, monkeypatch):
+    use_router(monkeypatch, ReplicaRouter(databases, 'round_robin', retry_after=30))
+    assert [await read_source() for _ in range(4)] == ['replica_0', 'replica_1', 'replica_2', 'replica_0']
+
+
+async def test_failed_replica_is_skipped_until_retry_after(databases, tmp_path, clock, monkeypatch):
+    broken = Replica('broken', f'sqlite+aiosqlite:///{tmp_path}/missing/replica.db')
+    router = use_router(monkeypatch, ReplicaRouter([broken, databases[0]], 'round_robin', retry_after=30))
+
+    assert await read_source() == 'replica_0'
+    assert names(router.candidates()) == ['replica_0']
+    clock.advance(30)
+    assert sorted(names(router.candidates())) == ['broken', 'replica_0']
+    await broken.engine.dispose()
+
+
+async def test_mark_down_and_retry(databases, clock):
+    router = ReplicaRouter(databases[:2], 'round_robin', retry_after=30)
+    router.mark_down(databases[0])
+    assert not databases[0].available
+    assert [names(router.candidates()) for _ in range(2)] == [['replica_1'], ['replica_1']]
+    clock.advance(30)
+    assert databases[0].available
+    assert sorted(names(router.candidates())) == ['replica_0', 'replica_1']
+
+
+async def test_falls_back_to_primary_when_every_replica_is_down(databases, monkeypatch):
+    router = use_router(monkeypatch, ReplicaRouter(databases, 'round_robin', retry_after=30))
+    for replica in databases:
+        router.mark_down(replica)
+    assert await read_source() == 'primary'
+
+
+async def test_falls_back_to_primary_without_replicas(databases, monkeypatch):
+    use_router(monkeypatch, ReplicaRouter([], 'round_robin', retry_after=30))
+    assert await read_source() == 'primary'
+
+
+async def test_reads_go_to_primary_after_invalidation(databases, clock, monkeypatch):
+    use_router(monkeypatch, ReplicaRouter(databases, 'round_robin', retry_after=30, hold_after_invalidation=5))
+    await cache.ResponseCache(cache.InMemoryCache(max_entries=10, ttl=60)).invalidate('products')
+    assert [await read_source() for _ in range(2)] == ['primary', 'primary']
+    clock.advance(5)
+    assert await read_source() == 'replica_0'
+
+
+async def test_no_hold_without_hold_after_invalidation(databases, monkeypatch):
+    router = use_router(monkeypatch, ReplicaRouter(databases, 'round_robin', retry_after=30))
+    router.invalidated()
+    assert await read_source() == 'replica_0'
+
+
+async def read_source_with_session_maker() -> str:
+    session_maker = await db_depends.get_read_session_maker()
+    async with session_maker() as session:
+        return await session.scalar(text('SELECT name FROM source'))
+
+
+async def test_streaming_reads_skip_a_failed_replica(databases, tmp_path, monkeypatch):
+    broken = Replica('broken', f'sqlite+aiosqlite:///{tmp_path}/missing/replica.db')
+    router = use_router(monkeypatch, ReplicaRouter([broken, databases[0]], 'round_robin', retry_after=30))
+    assert await read_source_with_session_maker() == 'replica_0'
+    assert not broken.available
+    router.mark_down(databases[0])
+    assert await read_source_with_session_maker() == 'primary'
+    await broken.engine.dispose()
@@ -0,0 +1,200 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.models import *
+from app.services import tasks
+from app.services.tasks import (DatabaseTaskQueue, InProcessTaskQueue, claim_jobs, create_task_queue, handlers,
+                                requeue_stale_jobs, run_due_jobs, task)
+from config import settings
+
+pytestmark = pytest.mark.anyio
+
+runs = []
+
+
+@task('test_record')
+async def record(db, value: int):
+    runs.append(value)
+
+
+@task('test_fail')
+async def fail(db, value: int):
+    runs.append(value)
+    raise RuntimeError(f'failed {value}')
+
+
+@pytest.fixture
+async def queue(catalog):
+    runs.clear()
+    queue = InProcessTaskQueue(catalog, maxsize=10, workers=1, max_attempts=3)
+    await queue.start()
+    yield queue
+    await queue.drain(timeout=5)
+
+
+async def test_waiting_jobs_with_the_same_key_run_once(queue):
+    for value in range(3):
+        await queue.submit('test_record', key='product-1', value=value)
+    await queue.submit('test_record', key='product-2', value=10)
+    await queue.drain(timeout=5)
+    # The waiting job runs with the newest arguments
+    assert runs == [2, 10]
+
+
+async def test_runs_inline_when_not_started(catalog):
+    runs.clear()
+    queue = InProcessTaskQueue(catalog, maxsize=10, workers=1, max_attempts=3)
+    await queue.submit('test_record', key='product-1', value=1)
+    assert runs == [1]
+
+
+async def test_review_burst_refreshes_the_rating(client, catalog, customer_headers, monkeypatch):
+    queue = InProcessTaskQueue(catalog, maxsize=10, workers=1, max_attempts=3)
+    monkeypatch.setattr('app.services.jobs.task_queue', queue)
+    refreshes = []
+    refresh = handlers['refresh_product_rating']
+
+    async def counting_refresh(db, product_id: int):
+        refreshes.append(product_id)
+        await refresh(db, product_id)
+
+    monkeypatch.setitem(handlers, 'refresh_product_rating', counting_refresh)
+    await queue.start()
+    for grade in (5, 4, 3):
+        response = await client.post('/reviewscreate', params={'product_slug': 'product-2'},
+                                     json={'comment': 'Burst', 'grade': grade}, headers=customer_headers)
+        assert response.json()['status_code'] == 201
+    await queue.drain(timeout=5)
+
+    assert set(refreshes) == {2}
+    async with catalog() as session:
+        product = await session.scalar(select(Product).where(Product.id == 2))
+    assert (product.rating_count, product.rating_sum, product.rating) == (3, 12, 4.0)
+
+
+def test_database_queue_needs_a_shared_cache(monkeypatch):
+    monkeypatch.setattr(settings, 'TASK_QUEUE_BACKEND', 'database')
+    monkeypatch.setattr(settings, 'CACHE_BACKEND', 'memory')
+    with pytest.raises(RuntimeError, match='CACHE_BACKEND=redis'):
+        create_task_queue()
+    monkeypatch.setattr(settings, 'CACHE_BACKEND', 'redis')
+    assert isinstance(create_task_queue(), DatabaseTaskQueue)
+
+
+async def test_rating_refresh_invalidates_cached_listings(client, catalog, customer_headers):
+    params = {'order_by': '-rating', 'limit': 1}
+    top = (await client.get('/products/', params=params)).json()['items'][0]
+    assert (top['slug'], top['rating'], top['rating_count']) == ('product-1', 3.8, 10)
+
+    response = await client.post('/reviewscreate', params={'product_slug': 'product-1'},
+                                 json={'comment': 'Broke', 'grade': 1}, headers=customer_headers)
+    assert response.json()['status_code'] == 201
+
+    top = (await client.get('/products/', params=params)).json()['items'][0]
+    assert (top['rating'], top['rating_count']) == (pytest.approx(39 / 11), 11)
+
+
+@pytest.mark.parametrize('deactivate', [
+    lambda client, headers: client.delete('/reviews/delete/product-1', headers=headers),
+    lambda client, headers: client.post('/reviews/deactivate', json={'product_ids': [1]}, headers=headers),
+])
+async def test_deactivating_reviews_invalidates_cached_ratings(client, catalog, admin_headers, deactivate):
+    assert (await client.get('/products/detail/product-1')).json()['rating_count'] == 10
+    assert (await deactivate(client, admin_headers)).json()['status_code'] == 200
+    detail = (await client.get('/products/detail/product-1')).json()
+    assert (detail['rating'], detail['rating_count']) == (0.0, 0)
+
+
+@pytest.fixture
+def database_queue(catalog, clock, monkeypatch) -> DatabaseTaskQueue:
+    runs.clear()
+    now = lambda: datetime.fromtimestamp(clock.time(), timezone.utc).replace(tzinfo=None)
+    monkeypatch.setattr(tasks, 'utcnow', now)
+    monkeypatch.setattr(settings, 'TASK_MAX_ATTEMPTS', 3)
+    monkeypatch.setattr(settings, 'TASK_RETRY_DELAY', 1)
+    monkeypatch.setattr(settings, 'TASK_JOB_TIMEOUT', 300)
+    return DatabaseTaskQueue(catalog)
+
+
+async def stored_jobs(session_maker) -> list[tuple]:
+    async with session_maker() as session:
+        rows = await session.execute(select(BackgroundJob.key, BackgroundJob.status, BackgroundJob.attempts,
+                                            BackgroundJob.args).order_by(BackgroundJob.id))
+        return [tuple(row) for row in rows]
+
+
+async def test_database_queue_coalesces_pending_jobs(database_queue, catalog):
+    await database_queue.submit('test_record', key='product-1', value=1)
+    await database_queue.submit('test_record', key='product-1', value=2)
+    await database_queue.submit('test_record', key='product-2', value=3)
+    assert await stored_jobs(catalog) == [('product-1', 'pending', 0, {'value': 1}),
+                                          ('product-2', 'pending', 0, {'value': 3})]
+
+    assert await run_due_jobs(catalog, batch=10) == 2
+    # Finished jobs are deleted; the pending one ran once and saw every change made before it was claimed
+    assert runs == [1, 3]
+    assert await stored_jobs(catalog) == []
+
+
+async def test_database_queue_takes_a_new_job_while_one_runs(database_queue, catalog):
+    await database_queue.submit('test_record', key='product-1', value=1)
+    async with catalog() as session:
+        assert [job[2] for job in await claim_jobs(session, 10)] == ['product-1']
+    await database_queue.submit('test_record', key='product-1', value=2)
+    assert await stored_jobs(catalog) == [('product-1', 'running', 1, {'value': 1}),
+                                          ('product-1', 'pending', 0, {'value': 2})]
+
+
+async def test_database_queue_retries_with_backoff_until_failed(database_queue, catalog, clock):
+    await database_queue.submit('test_fail', key='product-1', value=1)
+
+    assert await run_due_jobs(catalog, batch=10) == 1
+    assert await stored_jobs(catalog) == [('product-1', 'pending', 1, {'value': 1})]
+    # Not due until TASK_RETRY_DELAY, then twice that
+    assert await run_due_jobs(catalog, batch=10) == 0
+    clock.advance(1)
+    assert await run_due_jobs(catalog, batch=10) == 1
+    clock.advance(1)
+    assert await run_due_jobs(catalog, batch=10) == 0
+    clock.advance(1)
+    assert await run_due_jobs(catalog, batch=10) == 1
+
+    assert runs == [1, 1, 1]
+    assert await stored_jobs(catalog) == [('product-1', 'failed', 3, {'value': 1})]
+    async with catalog() as session:
+        assert await session.scalar(select(BackgroundJob.last_error)) == 'RuntimeError: failed 1'
+    clock.advance(60)
+    assert await run_due_jobs(catalog, batch=10) == 0
+
+
+async def test_failed_run_is_superseded_by_a_newer_submission(database_queue, catalog):
+    await database_queue.submit('test_fail', key='product-1', value=1)
+    async with catalog() as session:
+        [(job_id, name, key, args, attempts)] = await claim_jobs(session, 10)
+    await database_queue.submit('test_fail', key='product-1', value=2)
+
+    async with catalog() as session:
+        # The retry would be a second pending job under the same key; the newer one covers it
+        await tasks.finish_job(session, job_id, name, key, attempts, 'RuntimeError: failed 1')
+    assert await stored_jobs(catalog) == [('product-1', 'pending', 0, {'value': 2})]
+
+
+async def test_stale_running_jobs_are_requeued_or_dropped(database_queue, catalog, clock):
+    await database_queue.submit('test_record', key='product-1', value=1)
+    await database_queue.submit('test_record', key='product-2', value=2)
+    async with catalog() as session:
+        assert len(await claim_jobs(session, 10)) == 2
+    await database_queue.submit('test_record', key='product-2', value=3)
+
+    async with catalog() as session:
+        assert await requeue_stale_jobs(session) == 0
+        clock.advance(301)
+        # product-1 goes back to pending; the lost product-2 run is covered by its pending resubmission
+        assert await requeue_stale_jobs(session) == 1
+    assert await stored_jobs(catalog) == [('product-1', 'pending', 1, {'value': 1}),
+                                          ('product-2', 'pending', 0, {'value': 3})]
+
+    assert await run_due_jobs(catalog, batch=10) == 2
+    assert runs == [1, 3]
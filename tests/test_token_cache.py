@@ -0,0 +1,23 @@
+import pytest
+
+from app.services.token_cache import InMemoryRevocationList, RedisRevocationList
+from tests.fakes import FakeRedis
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def revocation_list(request, clock, monkeypatch):
+    if request.param == 'redis':
+        return RedisRevocationList(FakeRedis(clock), ttl=900)
+    monkeypatch.setattr('app.services.token_cache.time', clock)
+    return InMemoryRevocationList(ttl=900)
+
+
+async def test_revocation_list(revocation_list, clock):
+    assert not await revocation_list.is_revoked(1)
+    await revocation_list.revoke_user(1)
+    assert await revocation_list.is_revoked(1)
+    assert not await revocation_list.is_revoked(2)
+    clock.advance(901)
+    assert not await revocation_list.is_revoked(1)